@@ -0,0 +1,387 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from config import env_flag, env_str
+from knowledge import build_context
+from metrics import metrics
+from resilience import agent_timeout, call, describe
+from response_cache import cache_key, get_cache
+
+logger = logging.getLogger(__name__)
+
+MODEL = "gpt-4.1-2025-04-14"
+MODEL_CLIENT = env_str("MODEL_CLIENT", "openai")
+MODEL_BASE_URL = env_str("MODEL_BASE_URL")
+FALLBACK_MODEL = env_str("FALLBACK_MODEL")
+FALLBACK_BASE_URL = env_str("FALLBACK_BASE_URL", MODEL_BASE_URL)
+PHOTO_AGENT_VISION = env_flag("PHOTO_AGENT_VISION")
+
+PHOTO_UPLOADED = "User has uploaded an image of corrosion."
+MITIGATION_REQUEST = "Please provide mitigation steps."
+
+
+class AgentError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    name: str
+    system_message: str
+    knowledge_kind: str = None
+    knowledge_prefix: str = None
+    accepts_images: bool = False
+
+
+ASSET_AGENT = AgentSpec(
+    "asset_management",
+    system_message="""
+            You are an Asset Management Retrieval Agent.
+            When the engineer provides an asset number or tag:
+            Acknowledge the request briefly.
+            Retrieve and return the asset details from the management system.
+            Present the information in a clear, structured format, including (when available):
+
+            Equipment type
+            Tag/ID
+            Standard/specification
+            Material
+            Service
+            Normal operating conditions
+            Last maintenance/overhaul date
+
+            Rules:
+            If the message includes a registry record, present exactly those details and do not invent any others.
+            Otherwise, since you don't have a connection to the database, generate something randomly, but replace the asset number with the user's input and keep the Equipment as Flowserve centrifugal pump itself for all the asset numbers.
+
+            Example Output:
+            "Asset {number} Details:
+
+- Equipment: Flowserve centrifugal pump
+- Tag: P-{number}A
+- Standard: API 610
+- Material: CF8M
+- Service: Produced water / condensate
+- Normal temperature: 65–85 °C
+- Last overhaul: 4 months ago
+
+            Before assessing, could you upload a photo of the corroded area?"
+            """
+)
+
+PHOTO_AGENT = AgentSpec(
+    "photo_agent",
+    system_message="""
+            You are a photo analysis agent. When you receive confirmation that an image has been uploaded, respond with:
+            "Preliminary Assessment Based on Image
+
+            - Presence of iron carbonate (FeCO₃) scale deposits
+            - Localized grooving or channeling along flow direction (flow-assisted sweet corrosion)
+            - Uniform or mesa-type attack in areas with unstable FeCO₃ film
+            
+
+            This aligns with CO2 corrosion, which matches the behavior described in:
+
+            - API 571 – Damage Mechanisms (Section: CO2 corrosion)
+            - Reference: https://www.api.org/products-and-services/standards
+
+            To confirm the mechanism, I'll need chemistry and process data for the last 3–6 months:
+
+- Chlorides (ppm)
+- pH
+- Dissolved oxygen (ppb)
+- Temperature
+- Flow regime (any low-flow or minimum flow operation)
+- Inhibitor / scavenger dosing"
+            """,
+    accepts_images=PHOTO_AGENT_VISION
+)
+
+
+@functools.lru_cache(maxsize=None)
+def solution_agent(mechanism):
+    return AgentSpec(
+        "solution_expertise",
+        system_message=f"""
+            You are a reasoning agent for {mechanism.title} (API 571 {mechanism.number}).
+            The relevant sections of the knowledge description are provided at the start of each message.
+            Your task:
+            1. Acknowledge the chemistry data provided.
+            2. Perform analysis and randomly select the top 3 reasons from the knowledge description.
+            3. Do not mention randomly word in the output or top 3.
+            4. Return these top 3 reasons to the user.
+            5. Choose one among them as the "best" and clearly state it.
+            6. After that, output exactly:
+
+            "Maintenance History Correlation
+
+            Maintenance logs show:
+
+- Casing open for ~48 hours during overhaul
+- Nitrogen blanketing offline
+- Reduced scavenger dose after restart
+
+            This aligns with the contributors to localized corrosion after maintenance—specifically those related to oxygen ingress—as documented in API 571 (pages 93–97).
+            - Reference: https://www.api.org/products-and-services/standards
+            "
+
+            6. Finally ask: "Do you need the mitigation or prevention steps for the above problem?"
+            """,
+        knowledge_kind="description",
+        knowledge_prefix=mechanism.number
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def mitigation_agent(mechanism):
+    return AgentSpec(
+        "mitigation_agent",
+        system_message=f"""
+            You are a mitigation agent for {mechanism.title} (API 571 {mechanism.number}).
+            The relevant sections of the knowledge_mitigation are provided at the start of each message.
+            Your task:
+            1. Read the knowledge_mitigation.
+            2. Randomly select the top 2 mitigation methods.
+            3. Return these top 2 methods to the user.
+            4. Do not mention randomly word or top 2.
+            5. Add these references - "This aligns with the contributors to localized corrosion after maintenance—specifically those related to oxygen ingress—as documented in API 571 (pages 93–97).
+            - Reference: https://www.api.org/products-and-services/standards
+            6. Finally ask: "Do you need the location of the pump in 3D plant model?"
+            """,
+        knowledge_kind="mitigation",
+        knowledge_prefix=mechanism.number
+    )
+
+
+_model_client = None
+_fallback_client = None
+_lock = threading.Lock()
+
+
+def get_model_client():
+    global _model_client
+    with _lock:
+        if _model_client is None:
+            _model_client = create_model_client()
+    return _model_client
+
+
+def get_fallback_client():
+    global _fallback_client
+    with _lock:
+        if _fallback_client is None and FALLBACK_MODEL:
+            _fallback_client = create_model_client(model=FALLBACK_MODEL, base_url=FALLBACK_BASE_URL)
+    return _fallback_client
+
+
+def model_clients():
+    clients = [("primary", get_model_client())]
+    if get_fallback_client() is not None:
+        clients.append(("fallback", get_fallback_client()))
+    return clients
+
+
+def load_agent_stack():
+    import autogen_agentchat.agents
+    import autogen_agentchat.messages
+    import autogen_agentchat.state
+    import context_policy
+    if MODEL_CLIENT != "mock":
+        import autogen_ext.models.openai
+
+
+def create_model_client(kind=MODEL_CLIENT, model=MODEL, base_url=MODEL_BASE_URL):
+    if kind == "mock":
+        from mock_client import MockChatCompletionClient
+        return MockChatCompletionClient.from_env()
+    from autogen_ext.models.openai import OpenAIChatCompletionClient
+    options = {"base_url": base_url} if base_url else {}
+    return OpenAIChatCompletionClient(
+        model=model,
+        temperature=0,
+        stream_options={"include_usage": True},
+        max_retries=0,
+        **options
+    )
+
+
+async def build_agent(spec, states, model_client=None):
+    from autogen_agentchat.agents import AssistantAgent
+    from context_policy import build_model_context
+    model_client = model_client or get_model_client()
+    model_context = build_model_context(model_client)
+    agent = AssistantAgent(
+        spec.name,
+        model_client=model_client,
+        system_message=spec.system_message,
+        model_client_stream=True,
+        model_context=model_context
+    )
+    if spec.name in states:
+        await agent.load_state(states[spec.name])
+    return agent, model_context
+
+
+def record_usage(spec, model_context, chat_message, started):
+    from autogen_core.models import SystemMessage
+    usage = chat_message.models_usage
+    prompt_tokens = usage.prompt_tokens if usage else 0
+    completion_tokens = usage.completion_tokens if usage else 0
+    try:
+        context_tokens = get_model_client().count_tokens(
+            [SystemMessage(content=spec.system_message), *model_context.messages]
+        )
+    except Exception as e:
+        logger.warning("%s: could not count context tokens: %s", spec.name, e)
+        context_tokens = "n/a"
+    logger.info(
+        "%s: context_messages=%d context_tokens=%s prompt_tokens=%d completion_tokens=%d",
+        spec.name,
+        len(model_context.messages),
+        context_tokens,
+        prompt_tokens,
+        completion_tokens
+    )
+    metrics.record_call(spec.name, time.perf_counter() - started, prompt_tokens, completion_tokens)
+
+
+def prepare_message(spec, message):
+    if spec.knowledge_kind is None:
+        return message
+    context = build_context(message, kind=spec.knowledge_kind, prefix=spec.knowledge_prefix)
+    if not context:
+        return message
+    return f"Relevant API 571 sections:\n\n{context}\n\n---\n\n{message}"
+
+
+def build_message(spec, prompt, images):
+    from autogen_agentchat.messages import MultiModalMessage, TextMessage
+    from autogen_core import Image
+    if not (spec.accepts_images and images):
+        return TextMessage(content=prompt, source="user")
+    return MultiModalMessage(
+        content=[prompt, *(Image.from_base64(image.to_base64()) for image in images)],
+        source="user"
+    )
+
+
+def lookup_cached(spec, states, prompt, images=()):
+    cache = get_cache()
+    if cache is None:
+        return None, None
+    context = states.get(spec.name, {}).get("llm_context", {}).get("messages", [])
+    if spec.accepts_images:
+        prompt = [prompt, *(image.digest for image in images)]
+    key = cache_key(spec.name, spec.system_message, f"{MODEL_CLIENT}:{MODEL}", context, prompt)
+    return key, cache.get(key)
+
+
+def store_cached(key, response):
+    cache = get_cache()
+    if cache is not None and key is not None:
+        cache.put(key, response)
+
+
+def record_exchange(spec, states, prompt, response):
+    from autogen_agentchat.state import AssistantAgentState
+    from autogen_core.models import AssistantMessage, UserMessage
+    if spec.name in states:
+        state = AssistantAgentState.model_validate(states[spec.name])
+    else:
+        state = AssistantAgentState()
+    messages = list(state.llm_context.get("messages", []))
+    messages.append(UserMessage(content=prompt, source="user").model_dump())
+    messages.append(AssistantMessage(content=response, source=spec.name).model_dump())
+    state.llm_context = {**state.llm_context, "messages": messages}
+    states[spec.name] = state.model_dump()
+
+
+async def open_stream(spec, states, prompt, images, model_client):
+    agent, model_context = await build_agent(spec, states, model_client)
+    events = agent.on_messages_stream([build_message(spec, prompt, images)], cancellation_token=None)
+    try:
+        first = await anext(events)
+    except BaseException:
+        await events.aclose()
+        raise
+    return model_client, agent, model_context, first, events
+
+
+async def close_stream(opened):
+    await opened[-1].aclose()
+
+
+async def chain(first, events):
+    yield first
+    async for event in events:
+        yield event
+
+
+async def get_agent_response(spec, states, message, images=()):
+    started = time.perf_counter()
+    prompt = prepare_message(spec, message)
+    key, cached = lookup_cached(spec, states, prompt, images)
+    if cached is not None:
+        record_exchange(spec, states, prompt, cached)
+        metrics.record_call(spec.name, time.perf_counter() - started, cache_hit=True)
+        return cached
+
+    async def attempt(model_client):
+        agent, model_context = await build_agent(spec, states, model_client)
+        response = await agent.on_messages([build_message(spec, prompt, images)], cancellation_token=None)
+        return model_client, agent, model_context, response
+
+    try:
+        model_client, agent, model_context, response = await call(spec.name, attempt, model_clients())
+        states[spec.name] = await agent.save_state()
+    except Exception as e:
+        metrics.record_call(spec.name, time.perf_counter() - started, error=True)
+        return f"Error: {describe(e, spec.name)}"
+    record_usage(spec, model_context, response.chat_message, started)
+    if model_client is get_model_client():
+        store_cached(key, response.chat_message.content)
+    return response.chat_message.content
+
+
+async def stream_agent_response(spec, states, message, images=()):
+    from autogen_agentchat.base import Response
+    from autogen_agentchat.messages import ModelClientStreamingChunkEvent
+    started = time.perf_counter()
+    prompt = prepare_message(spec, message)
+    key, cached = lookup_cached(spec, states, prompt, images)
+    if cached is not None:
+        record_exchange(spec, states, prompt, cached)
+        metrics.record_call(spec.name, time.perf_counter() - started, cache_hit=True)
+        yield cached
+        return
+    streamed = False
+    deadline = asyncio.get_running_loop().time() + agent_timeout(spec.name)
+    try:
+        model_client, agent, model_context, first, events = await call(
+            spec.name,
+            lambda model_client: open_stream(spec, states, prompt, images, model_client),
+            model_clients(),
+            discard=close_stream,
+            deadline=deadline
+        )
+        async with asyncio.timeout_at(deadline):
+            async for event in chain(first, events):
+                if isinstance(event, ModelClientStreamingChunkEvent):
+                    streamed = True
+                    yield event.content
+                elif isinstance(event, Response):
+                    chat_message = event.chat_message
+                    content = chat_message.content
+                    if not streamed:
+                        yield content
+        states[spec.name] = await agent.save_state()
+    except Exception as e:
+        metrics.record_call(spec.name, time.perf_counter() - started, error=True)
+        raise AgentError(describe(e, spec.name)) from e
+    record_usage(spec, model_context, chat_message, started)
+    if model_client is get_model_client():
+        store_cached(key, content)
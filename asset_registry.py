@@ -0,0 +1,205 @@
+import argparse
+import csv
+import re
+import sqlite3
+import sys
+import threading
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+from config import env_flag, env_str
+
+REGISTRY_PATH = Path(env_str("ASSET_REGISTRY_PATH", "data/asset_registry.sqlite3"))
+PHRASE_WITH_LLM = env_flag("ASSET_REGISTRY_PHRASE")
+
+TAG_PATTERN = re.compile(r"\b[A-Za-z]{0,4}-?\d{2,}[A-Za-z0-9-]*\b")
+
+COLUMN_ALIASES = {
+    "tag": ("tag", "tag_id", "asset_tag", "tag_number", "functional_location"),
+    "asset_number": ("asset_number", "asset_no", "asset", "equipment_number", "equipment_no"),
+    "equipment": ("equipment", "equipment_type", "description", "equipment_description"),
+    "standard": ("standard", "specification", "design_code"),
+    "material": ("material", "material_of_construction", "moc"),
+    "service": ("service", "fluid", "process_service"),
+    "operating_conditions": ("operating_conditions", "normal_temperature", "operating_temperature", "conditions"),
+    "last_overhaul": ("last_overhaul", "last_maintenance", "last_overhaul_date", "last_maintenance_date"),
+}
+
+
+@dataclass(frozen=True)
+class Asset:
+    tag: str
+    asset_number: str = ""
+    equipment: str = ""
+    standard: str = ""
+    material: str = ""
+    service: str = ""
+    operating_conditions: str = ""
+    last_overhaul: str = ""
+
+    def to_markdown(self):
+        rows = [
+            ("Equipment", self.equipment),
+            ("Tag", self.tag),
+            ("Asset number", self.asset_number),
+            ("Standard", self.standard),
+            ("Material", self.material),
+            ("Service", self.service),
+            ("Normal operating conditions", self.operating_conditions),
+            ("Last overhaul", self.last_overhaul),
+        ]
+        details = "\n".join(f"- {label}: {value}" for label, value in rows if value)
+        return f"Asset {self.tag} Details:\n\n{details}\n\nBefore assessing, could you upload a photo of the corroded area?"
+
+
+ASSET_FIELDS = [field.name for field in fields(Asset)]
+
+
+def normalize_tag(tag):
+    return re.sub(r"[\s_]+", "", str(tag)).upper()
+
+
+def map_columns(header):
+    lookup = {name.strip().lower().replace(" ", "_"): name for name in header}
+    mapping = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lookup:
+                mapping[field] = lookup[alias]
+                break
+    if "tag" not in mapping and "asset_number" not in mapping:
+        raise ValueError(f"No tag or asset number column found in {list(header)}")
+    return mapping
+
+
+class AssetRegistry:
+    def __init__(self, path=REGISTRY_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS assets (
+                tag_key TEXT PRIMARY KEY,
+                asset_key TEXT,
+                tag TEXT NOT NULL,
+                asset_number TEXT,
+                equipment TEXT,
+                standard TEXT,
+                material TEXT,
+                service TEXT,
+                operating_conditions TEXT,
+                last_overhaul TEXT
+            );
+            CREATE INDEX IF NOT EXISTS assets_asset_key ON assets (asset_key);
+        """)
+
+    def import_csv(self, path, batch_size=5000):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            mapping = map_columns(reader.fieldnames or [])
+            imported = 0
+            batch = []
+            for row in reader:
+                values = {field: (row.get(column) or "").strip() for field, column in mapping.items()}
+                tag = values.get("tag") or values.get("asset_number")
+                if not tag:
+                    continue
+                values["tag"] = tag
+                batch.append(self._row(values))
+                if len(batch) >= batch_size:
+                    imported += self._upsert(batch)
+                    batch = []
+            imported += self._upsert(batch)
+        return imported
+
+    def _row(self, values):
+        asset_number = values.get("asset_number", "")
+        return (
+            normalize_tag(values["tag"]),
+            normalize_tag(asset_number) if asset_number else None,
+            *(values.get(field, "") for field in ASSET_FIELDS)
+        )
+
+    def _upsert(self, rows):
+        if not rows:
+            return 0
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO assets (tag_key, asset_key, "
+                + ", ".join(ASSET_FIELDS)
+                + ") VALUES (" + ", ".join("?" * (len(ASSET_FIELDS) + 2)) + ")",
+                rows
+            )
+        return len(rows)
+
+    def get(self, tag):
+        key = normalize_tag(tag)
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(ASSET_FIELDS)} FROM assets WHERE tag_key = ? OR asset_key = ? LIMIT 1",
+                (key, key)
+            ).fetchone()
+        return Asset(*(value or "" for value in row)) if row else None
+
+    def lookup(self, text):
+        asset = self.get(text)
+        if asset is not None:
+            return asset
+        for candidate in TAG_PATTERN.findall(text):
+            asset = self.get(candidate)
+            if asset is not None:
+                return asset
+        return None
+
+    def all(self):
+        with self._lock:
+            rows = self._db.execute(f"SELECT {', '.join(ASSET_FIELDS)} FROM assets ORDER BY tag_key").fetchall()
+        return [Asset(*(value or "" for value in row)) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+
+
+_registry = None
+_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _lock:
+        if _registry is None:
+            _registry = AssetRegistry()
+    return _registry
+
+
+def registry_prompt(message, asset):
+    return f"{message}\n\nRegistry record (present exactly these details):\n{asset.to_markdown()}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local asset registry.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="bulk-import EAM CSV exports")
+    import_parser.add_argument("files", nargs="+")
+    lookup_parser = commands.add_parser("lookup", help="look up an asset by tag or asset number")
+    lookup_parser.add_argument("tag")
+    args = parser.parse_args(argv)
+
+    registry = get_registry()
+    if args.command == "import":
+        for path in args.files:
+            print(f"{path}: {registry.import_csv(path)} assets imported")
+        print(f"registry now holds {registry.count()} assets")
+        return 0
+
+    asset = registry.lookup(args.tag)
+    if asset is None:
+        print(f"{args.tag}: not found")
+        return 1
+    print(asset.to_markdown())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
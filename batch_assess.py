@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from agents import (
+    ASSET_AGENT,
+    MITIGATION_REQUEST,
+    PHOTO_AGENT,
+    PHOTO_UPLOADED,
+    get_agent_response,
+    mitigation_agent,
+    solution_agent
+)
+from asset_registry import PHRASE_WITH_LLM, get_registry, registry_prompt
+from chemistry_engine import summarize_file
+from images import process_image
+from mechanisms import MECHANISMS, route
+from thickness import thickness_prompt
+
+logger = logging.getLogger("batch_assess")
+
+TAG_FIELDS = ("asset_tag", "asset_number", "tag")
+PHOTO_FIELDS = ("photo", "image")
+HISTORIAN_FIELDS = ("historian", "historian_file")
+
+
+class AgentCallError(Exception):
+    pass
+
+
+class RateLimiter:
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def read_records(path):
+    path = Path(path)
+    with path.open(newline="", encoding="utf-8") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def record_tag(record):
+    for field in TAG_FIELDS:
+        if record.get(field):
+            return str(record[field]).strip()
+    return None
+
+
+def chemistry_text(record):
+    for field in HISTORIAN_FIELDS:
+        if record.get(field):
+            return summarize_file(Path(record[field])).to_prompt()
+    if record.get("chemistry"):
+        return str(record["chemistry"])
+    skip = set(TAG_FIELDS) | set(PHOTO_FIELDS)
+    return "\n".join(
+        f"{key}: {value}"
+        for key, value in record.items()
+        if key not in skip and value not in (None, "")
+    )
+
+
+def completed_tags(path):
+    done = set()
+    if not Path(path).exists():
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not result.get("error"):
+                done.add(result["asset_tag"])
+    return done
+
+
+def load_photo(record):
+    for field in PHOTO_FIELDS:
+        if record.get(field):
+            return [process_image(Path(record[field]).read_bytes())]
+    return []
+
+
+async def call_agent(limiter, spec, states, message, images=()):
+    await limiter.acquire()
+    response = await get_agent_response(spec, states, message, images)
+    if response.startswith("Error:"):
+        raise AgentCallError(f"{spec.name}: {response}")
+    return response
+
+
+async def assess(record, limiter):
+    tag = record_tag(record)
+    states = {}
+    started = time.perf_counter()
+    result = {"asset_tag": tag}
+    try:
+        chemistry = await asyncio.to_thread(chemistry_text, record)
+        solution_message = await asyncio.to_thread(thickness_prompt, chemistry, tag)
+        mechanism = MECHANISMS.get(record.get("mechanism")) or route(chemistry, *record.values())
+        result["mechanism"] = f"{mechanism.number} {mechanism.title}"
+        photos = load_photo(record)
+        asset = get_registry().lookup(tag)
+        if asset is not None and not PHRASE_WITH_LLM:
+            asset_details = asyncio.sleep(0, asset.to_markdown())
+        elif asset is not None:
+            asset_details = call_agent(limiter, ASSET_AGENT, states, registry_prompt(tag, asset))
+        else:
+            asset_details = call_agent(limiter, ASSET_AGENT, states, tag)
+        result["asset_details"], result["photo_assessment"], result["root_cause"] = await asyncio.gather(
+            asset_details,
+            call_agent(limiter, PHOTO_AGENT, states, PHOTO_UPLOADED, photos),
+            call_agent(limiter, solution_agent(mechanism), states, solution_message)
+        )
+        result["mitigation"] = await call_agent(limiter, mitigation_agent(mechanism), states, MITIGATION_REQUEST)
+    except Exception as e:
+        result["error"] = str(e)
+    result["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+async def run_batch(input_path, output_path, concurrency, requests_per_minute, resume=True):
+    done = completed_tags(output_path) if resume else set()
+    limiter = RateLimiter(requests_per_minute)
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+        async def worker():
+            while True:
+                record = await queue.get()
+                if record is None:
+                    return
+                result = await assess(record, limiter)
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                counts["failed" if "error" in result else "ok"] += 1
+                logger.info("%s %s in %.1fs", result["asset_tag"], "failed" if "error" in result else "done", result["elapsed_s"])
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        for record in read_records(input_path):
+            tag = record_tag(record)
+            if tag is None or tag in done:
+                counts["skipped"] += 1
+                continue
+            done.add(tag)
+            await queue.put(record)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the asset integrity assessment pipeline over a batch of asset tags.")
+    parser.add_argument("input", help="CSV or JSONL file with asset_tag and chemistry columns")
+    parser.add_argument("-o", "--output", default="assessments.jsonl", help="JSONL results file, also used as the resume checkpoint")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="assessments processed at the same time")
+    parser.add_argument("--rpm", type=float, default=0, help="maximum agent requests per minute (0 = unlimited)")
+    parser.add_argument("--no-resume", action="store_true", help="overwrite the output instead of skipping completed tags")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    counts = asyncio.run(run_batch(args.input, args.output, args.concurrency, args.rpm, resume=not args.no_resume))
+    logger.info("finished: %(ok)d done, %(failed)d failed, %(skipped)d skipped", counts)
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
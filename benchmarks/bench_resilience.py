@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import standin_server
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+async def run_calls(calls, concurrency):
+    from agents import get_agent_response, solution_agent
+    from mechanisms import get_mechanism
+
+    spec = solution_agent(get_mechanism())
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await get_agent_response(spec, {}, f"Chlorides {i} ppm, pH 5.6, dissolved oxygen 25 ppb")
+            latencies.append(time.perf_counter() - started)
+            errors += response.startswith("Error:")
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return latencies, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure agent-call tail latency against a degraded stand-in LLM.")
+    parser.add_argument("-n", "--calls", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--tail-rate", type=float, default=0.05)
+    parser.add_argument("--tail-latency", type=float, default=3.0)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--hedge", action="store_true", help="enable hedged requests after the p95 latency")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-agent deadline in seconds")
+    args = parser.parse_args(argv)
+
+    server, degradation = standin_server.start(0, standin_server.Degradation(
+        args.latency, args.tail_rate, args.tail_latency, args.failure_rate
+    ))
+    os.environ.update({
+        "MODEL_CLIENT": "openai",
+        "MODEL_BASE_URL": f"http://127.0.0.1:{server.server_address[1]}/v1",
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "stand-in"),
+        "RESPONSE_CACHE": "0",
+        "AGENT_HEDGE": "1" if args.hedge else "0",
+        "AGENT_TIMEOUT": str(args.timeout),
+    })
+
+    started = time.perf_counter()
+    latencies, errors = asyncio.run(run_calls(args.calls, args.concurrency))
+    elapsed = time.perf_counter() - started
+
+    from metrics import metrics
+    events = {}
+    for (_, event), count in metrics.events.items():
+        events[event] = events.get(event, 0) + count
+
+    print(f"{args.calls} calls in {elapsed:.1f} s, {degradation.requests} upstream requests, {errors} errors")
+    print(
+        f"p50 {statistics.median(latencies):.2f} s  p95 {percentile(latencies, 0.95):.2f} s  "
+        f"p99 {percentile(latencies, 0.99):.2f} s  max {max(latencies):.2f} s"
+    )
+    print("events: " + (", ".join(f"{event}={count}" for event, count in sorted(events.items())) or "none"))
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from asset_registry import AssetRegistry
+from bench_thickness import synthetic_readings
+from risk import RiskEngine
+from thickness import ThicknessStore
+
+MATERIALS = ("Carbon steel A106 Gr B", "SA-516-70", "1.25Cr-0.5Mo", "12Cr (410 SS)", "316L SS", "Duplex 2205")
+SERVICES = ("Steam condensate", "Boiler feed water", "Sour water", "Hydrocarbon vapour", "Amine", "Cooling water")
+
+
+def synthetic_chemistry(tags, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "tag": tags,
+        "pH": rng.normal(6.5, 0.6, len(tags)).round(2),
+        "Dissolved Oxygen (ppb)": rng.lognormal(2.0, 1.0, len(tags)).round(1),
+        "Temperature (C)": rng.normal(140, 25, len(tags)).round(1),
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure fleet risk ranking and incremental re-ranking.")
+    parser.add_argument("-a", "--assets", type=int, default=50_000)
+    parser.add_argument("-n", "--readings", type=int, default=2_000_000)
+    parser.add_argument("--changed", type=int, default=50, help="assets whose chemistry changes between rankings")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        tags = [f"P-{i:05d}" for i in range(args.assets)]
+        registry_csv = directory / "registry.csv"
+        pd.DataFrame({
+            "tag": tags,
+            "equipment": "Piping circuit",
+            "material": [MATERIALS[i % len(MATERIALS)] for i in range(args.assets)],
+            "service": [SERVICES[i % len(SERVICES)] for i in range(args.assets)],
+        }).to_csv(registry_csv, index=False)
+        registry = AssetRegistry(directory / "registry.sqlite3")
+        registry.import_csv(registry_csv)
+        thickness = ThicknessStore(directory / "thickness")
+        thickness.append(synthetic_readings(args.readings, args.assets * 20))
+
+        engine = RiskEngine(registry, thickness)
+        started = time.perf_counter()
+        engine.load()
+        print(f"full ranking of {len(engine.tags):,} assets: {time.perf_counter() - started:.2f} s")
+
+        started = time.perf_counter()
+        engine.set_chemistry(synthetic_chemistry(tags))
+        print(f"chemistry for all assets: {time.perf_counter() - started:.2f} s")
+
+        started = time.perf_counter()
+        engine.set_chemistry(synthetic_chemistry(tags[:args.changed], seed=1))
+        ranked = engine.ranked(20)
+        print(f"{args.changed} assets changed, re-ranked: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        readings = synthetic_readings(1000, args.changed * 20, seed=2)
+        started = time.perf_counter()
+        thickness.append(readings)
+        engine.refresh()
+        engine.ranked(20)
+        print(f"new readings for {args.changed} assets, re-ranked: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        started = time.perf_counter()
+        engine.export(directory / "inspection_priorities.csv")
+        print(f"export: {time.perf_counter() - started:.2f} s")
+        print(ranked.head(10).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
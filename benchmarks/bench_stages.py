@@ -0,0 +1,140 @@
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("MODEL_CLIENT", "mock")
+os.environ.setdefault("RESPONSE_CACHE", "0")
+
+from PIL import Image
+from streamlit.testing.v1 import AppTest
+
+import agents
+
+APP = ROOT / "streamlit_app.py"
+
+CHEMISTRY = "Chlorides 45 ppm, pH 5.6, dissolved oxygen 25 ppb, temperature 80 °C, low flow at night, scavenger dose reduced"
+
+
+def sample_photo(width=3000, height=2000):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (120, 80, 60)).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def steps():
+    photo = sample_photo()
+    return [
+        ("initial", None),
+        ("asset_management", lambda at: at.chat_input[0].set_value("P-101")),
+        ("photo_agent", lambda at: at.file_uploader[0].set_value(("corrosion.jpg", photo, "image/jpeg"))),
+        ("solution_expertise", lambda at: at.chat_input[0].set_value(CHEMISTRY)),
+        ("mitigation_agent", lambda at: at.chat_input[0].set_value("yes")),
+        ("3d_model", lambda at: at.chat_input[0].set_value("yes")),
+    ]
+
+
+def pending_jobs(at):
+    return any("job" in message for message in at.session_state["messages"])
+
+
+def run_session(timeout):
+    client = agents.get_model_client()
+    at = AppTest.from_file(str(APP), default_timeout=timeout)
+    results = []
+    tracemalloc.start()
+    for stage, action in steps():
+        if action is not None:
+            action(at)
+        busy_before = client.busy_seconds
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        at.run()
+        while not at.exception and pending_jobs(at):
+            time.sleep(0.01)
+            at.run()
+        rerun = time.perf_counter() - started
+        after, peak = tracemalloc.get_traced_memory()
+        if at.exception:
+            raise RuntimeError(f"{stage}: {at.exception[0].value}")
+        agent = client.busy_seconds - busy_before
+        results.append({
+            "stage": stage,
+            "conversation_stage": at.session_state["conversation_stage"],
+            "rerun_s": rerun,
+            "agent_s": agent,
+            "render_s": max(rerun - agent, 0.0),
+            "memory_delta_kb": (after - before) / 1024,
+            "memory_peak_kb": (peak - before) / 1024,
+            "messages": len(at.session_state["messages"])
+        })
+    tracemalloc.stop()
+    return results
+
+
+def summarize(sessions):
+    summary = []
+    for position, first in enumerate(sessions[0]):
+        runs = [session[position] for session in sessions]
+        row = {"stage": first["stage"], "conversation_stage": first["conversation_stage"]}
+        for metric in ("rerun_s", "agent_s", "render_s", "memory_delta_kb", "memory_peak_kb"):
+            row[metric] = statistics.median(run[metric] for run in runs)
+        summary.append(row)
+    return summary
+
+
+def print_table(summary):
+    print(f"{'stage':<20}{'-> conversation_stage':<30}{'rerun ms':>10}{'agent ms':>10}{'render ms':>11}{'mem KB':>10}{'peak KB':>10}")
+    for row in summary:
+        print(
+            f"{row['stage']:<20}{row['conversation_stage']:<30}"
+            f"{row['rerun_s'] * 1000:>10.1f}{row['agent_s'] * 1000:>10.1f}{row['render_s'] * 1000:>11.1f}"
+            f"{row['memory_delta_kb']:>10.1f}{row['memory_peak_kb']:>10.1f}"
+        )
+
+
+def regressions(summary, baseline, threshold):
+    previous = {row["stage"]: row for row in baseline}
+    found = []
+    for row in summary:
+        before = previous.get(row["stage"])
+        if before and before["render_s"] > 0 and row["render_s"] > before["render_s"] * (1 + threshold):
+            found.append(f"{row['stage']}: render {before['render_s'] * 1000:.1f} ms -> {row['render_s'] * 1000:.1f} ms")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every conversation stage against the mock model client.")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="sessions to run; the median is reported")
+    parser.add_argument("--timeout", type=float, default=60.0, help="AppTest timeout per rerun in seconds")
+    parser.add_argument("--json", help="write the summary to this file")
+    parser.add_argument("--baseline", help="compare against a summary written earlier with --json")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed render-time slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    sessions = [run_session(args.timeout) for _ in range(args.repeat)]
+    summary = summarize(sessions)
+    print_table(summary)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        found = regressions(summary, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}")
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from thickness import ThicknessStore
+
+
+def synthetic_readings(readings, locations, seed=0):
+    rng = np.random.default_rng(seed)
+    location = rng.integers(0, locations, readings)
+    days = rng.integers(0, 10 * 365, readings)
+    nominal = 12.7 - (location % 7) * 0.5
+    rate_mm = (location % 11) * 0.02
+    thickness = nominal - rate_mm * days / 365.25 + rng.normal(0, 0.05, readings)
+    return pd.DataFrame({
+        "tag": [f"P-{i // 20:05d}" for i in location],
+        "cml": [f"CML-{i % 20:02d}" for i in location],
+        "timestamp": np.datetime64("2016-01-01") + days.astype("timedelta64[D]"),
+        "thickness_mm": thickness.round(2),
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure thickness ingestion and corrosion-rate computation.")
+    parser.add_argument("-n", "--readings", type=int, default=2_000_000)
+    parser.add_argument("-l", "--locations", type=int, default=100_000)
+    parser.add_argument("--format", choices=("csv", "parquet"), default="parquet")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory) / f"readings.{args.format}"
+        frame = synthetic_readings(args.readings, args.locations)
+        frame.to_csv(source, index=False) if args.format == "csv" else frame.to_parquet(source, index=False)
+
+        store = ThicknessStore(Path(directory) / "store")
+        started = time.perf_counter()
+        imported = store.import_file(source)
+        print(f"import: {imported:,} readings in {time.perf_counter() - started:.2f} s")
+
+        started = time.perf_counter()
+        rates = store.rates()
+        print(f"fleet rates: {rates['location'].size:,} CMLs in {time.perf_counter() - started:.2f} s")
+
+        started = time.perf_counter()
+        store.append(synthetic_readings(args.readings // 100, args.locations, seed=1))
+        rates = store.rates()
+        print(f"append 1% and recompute: {time.perf_counter() - started:.2f} s")
+
+        started = time.perf_counter()
+        summary = store.summary("P-00001")
+        print(f"tag summary: {time.perf_counter() - started:.3f} s")
+        print(summary.to_prompt())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
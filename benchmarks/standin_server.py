@@ -0,0 +1,155 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mock_client import DEFAULT_REPLIES
+
+
+class Degradation:
+    def __init__(self, latency=0.05, tail_rate=0.0, tail_latency=5.0, failure_rate=0.0, tokens_per_second=0.0):
+        self.latency = latency
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.failure_rate = failure_rate
+        self.tokens_per_second = tokens_per_second
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+
+def reply_for(messages):
+    system = " ".join(str(m.get("content", "")) for m in messages if m.get("role") == "system").lower()
+    for keyword, reply in DEFAULT_REPLIES.items():
+        if keyword.lower() in system:
+            last = messages[-1].get("content", "") if messages else ""
+            if not isinstance(last, str):
+                last = " ".join(part.get("text", "") for part in last if part.get("type") == "text")
+            return reply.replace("{last_message}", last.strip().splitlines()[-1] if last.strip() else "")
+    return "OK"
+
+
+def make_handler(degradation):
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self.send_json(200, {"object": "list", "data": [{"id": "stand-in", "object": "model", "owned_by": "stand-in"}]})
+            else:
+                self.send_json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            degradation.count()
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_json(404, {"error": {"message": "not found"}})
+                return
+            if random.random() < degradation.failure_rate:
+                self.send_json(500, {"error": {"message": "stand-in upstream failure", "type": "server_error"}})
+                return
+            slow = random.random() < degradation.tail_rate
+            time.sleep(degradation.tail_latency if slow else degradation.latency)
+
+            reply = reply_for(body.get("messages", []))
+            usage = {
+                "prompt_tokens": len(json.dumps(body.get("messages", []))) // 4,
+                "completion_tokens": len(reply.split()),
+            }
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            base = {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "created": int(time.time()),
+                "model": body.get("model", "stand-in"),
+            }
+            if not body.get("stream"):
+                self.send_json(200, {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": reply}}],
+                    "usage": usage,
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            try:
+                for i, word in enumerate(reply.split(" ")):
+                    if degradation.tokens_per_second:
+                        time.sleep(1 / degradation.tokens_per_second)
+                    self.send_event({**base, "object": "chat.completion.chunk", "choices": [
+                        {"index": 0, "finish_reason": None, "delta": {"content": word if i == 0 else " " + word}}
+                    ]})
+                self.send_event({**base, "object": "chat.completion.chunk", "choices": [
+                    {"index": 0, "finish_reason": "stop", "delta": {}}
+                ]})
+                if body.get("stream_options", {}).get("include_usage"):
+                    self.send_event({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            self.close_connection = True
+
+        def send_event(self, payload):
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        def send_json(self, status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandInHandler
+
+
+def start(port=0, degradation=None):
+    degradation = degradation or Degradation()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(degradation))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="standin-llm", daemon=True).start()
+    return server, degradation
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stand-in server with injectable degradation.")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before the first token")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="fraction of requests that are slow")
+    parser.add_argument("--tail-latency", type=float, default=5.0, help="seconds before the first token of slow requests")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server, _ = start(args.port, Degradation(
+        args.latency, args.tail_rate, args.tail_latency, args.failure_rate, args.tokens_per_second
+    ))
+    print(f"Stand-in LLM on http://127.0.0.1:{server.server_address[1]}/v1 (set MODEL_BASE_URL and OPENAI_API_KEY)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import io
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import env_float
+
+OXYGEN_LIMIT_PPB = env_float("CHEMISTRY_OXYGEN_LIMIT_PPB", 10.0)
+PH_LIMIT = env_float("CHEMISTRY_PH_LIMIT", 6.0)
+DEW_POINT_C = env_float("CHEMISTRY_DEW_POINT_C", "nan")
+LOW_FLOW_FRACTION = env_float("CHEMISTRY_LOW_FLOW_FRACTION", 0.3)
+
+COLUMN_ALIASES = {
+    "timestamp": ("timestamp", "time", "datetime", "date_time", "date", "ts"),
+    "oxygen_ppb": ("dissolved_oxygen_ppb", "oxygen_ppb", "do_ppb", "o2_ppb", "dissolved_oxygen", "oxygen", "o2", "do"),
+    "ph": ("ph",),
+    "chlorides_ppm": ("chlorides_ppm", "chloride_ppm", "chlorides", "chloride", "cl_ppm", "cl"),
+    "temperature_c": ("temperature_c", "temp_c", "temperature", "temp"),
+    "dew_point_c": ("dew_point_c", "dew_point", "dewpoint"),
+    "flow": ("flow", "flow_rate", "flowrate", "flow_m3h", "flow_m3_h"),
+}
+
+
+@dataclass
+class Exceedance:
+    label: str
+    samples: int
+    fraction: float
+    episodes: int
+    longest_hours: float
+    worst: float
+
+    def describe(self):
+        if not self.samples:
+            return f"- {self.label}: no exceedances"
+        return (
+            f"- {self.label}: {self.fraction:.1%} of samples, {self.episodes} episodes, "
+            f"longest {self.longest_hours:.1f} h, worst {self.worst:.3g}"
+        )
+
+
+@dataclass
+class ChemistrySummary:
+    rows: int
+    start: str
+    end: str
+    resolution_minutes: float
+    exceedances: list = field(default_factory=list)
+    statistics: dict = field(default_factory=dict)
+    latest: dict = field(default_factory=dict)
+
+    def to_prompt(self):
+        lines = [
+            f"Process historian summary ({self.rows:,} samples, {self.start} to {self.end}, "
+            f"~{self.resolution_minutes:g} min resolution), checked against API 571 3.18.3 critical factors:"
+        ]
+        lines.extend(exceedance.describe() for exceedance in self.exceedances)
+        for name, stats in self.statistics.items():
+            lines.append(f"- {name}: mean {stats['mean']:g}, min {stats['min']:g}, max {stats['max']:g}")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        data["exceedances"] = [Exceedance(**exceedance) for exceedance in data.get("exceedances", [])]
+        return cls(**data)
+
+
+def normalize_columns(frame, column_aliases=COLUMN_ALIASES):
+    lookup = {str(name).strip().lower().replace(" ", "_").replace("(", "").replace(")", ""): name for name in frame.columns}
+    renamed = {}
+    for canonical, aliases in column_aliases.items():
+        for alias in aliases:
+            if alias in lookup:
+                renamed[lookup[alias]] = canonical
+                break
+    return frame[list(renamed)].rename(columns=renamed)
+
+
+def read_history(source, name=None):
+    name = str(name or getattr(source, "name", source))
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    if name.lower().endswith((".parquet", ".pq")):
+        frame = pd.read_parquet(source)
+    else:
+        try:
+            frame = pd.read_csv(source, engine="pyarrow")
+        except (ImportError, ValueError):
+            if hasattr(source, "seek"):
+                source.seek(0)
+            frame = pd.read_csv(source)
+    frame = normalize_columns(frame)
+    if "timestamp" in frame:
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"], errors="coerce")
+        frame = frame.dropna(subset=["timestamp"]).sort_values("timestamp", kind="stable")
+    return frame
+
+
+def runs(mask):
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return starts, ends
+
+
+def exceedance(label, mask, values, hours, step_hours, worst):
+    mask = np.asarray(mask, dtype=bool)
+    samples = int(mask.sum())
+    if not samples:
+        return Exceedance(label, 0, 0.0, 0, 0.0, 0.0)
+    starts, ends = runs(mask)
+    durations = hours[ends - 1] - hours[starts] + step_hours
+    return Exceedance(
+        label,
+        samples,
+        samples / mask.size,
+        int(starts.size),
+        float(durations.max()),
+        float(worst(values[mask]))
+    )
+
+
+def analyze(frame, oxygen_limit=OXYGEN_LIMIT_PPB, ph_limit=PH_LIMIT, dew_point=DEW_POINT_C, low_flow_fraction=LOW_FLOW_FRACTION):
+    rows = len(frame)
+    if not rows:
+        raise ValueError("No usable rows in the process data")
+
+    if "timestamp" in frame:
+        seconds = frame["timestamp"].to_numpy(dtype="datetime64[s]").astype(np.int64)
+        hours = (seconds - seconds[0]) / 3600.0
+        start, end = str(frame["timestamp"].iloc[0]), str(frame["timestamp"].iloc[-1])
+    else:
+        hours = np.arange(rows, dtype=np.float64) / 60.0
+        start, end = "sample 1", f"sample {rows}"
+    step_hours = float(np.median(np.diff(hours))) if rows > 1 else 0.0
+
+    def column(name):
+        return frame[name].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    summary = ChemistrySummary(rows, start, end, round(step_hours * 60, 2))
+
+    if "oxygen_ppb" in frame:
+        oxygen = column("oxygen_ppb")
+        summary.exceedances.append(exceedance(
+            f"Dissolved oxygen > {oxygen_limit:g} ppb", oxygen > oxygen_limit, oxygen, hours, step_hours, np.max
+        ))
+
+    if "ph" in frame:
+        ph = column("ph")
+        summary.exceedances.append(exceedance(
+            f"pH < {ph_limit:g}", ph < ph_limit, ph, hours, step_hours, np.min
+        ))
+
+    if "temperature_c" in frame and ("dew_point_c" in frame or not np.isnan(dew_point)):
+        temperature = column("temperature_c")
+        dew = column("dew_point_c") if "dew_point_c" in frame else np.full(rows, dew_point)
+        summary.exceedances.append(exceedance(
+            "Temperature below dew point" + ("" if "dew_point_c" in frame else f" ({dew_point:g} °C)"),
+            temperature < dew, temperature, hours, step_hours, np.min
+        ))
+
+    if "flow" in frame:
+        flow = column("flow")
+        threshold = low_flow_fraction * float(np.nanmedian(flow))
+        summary.exceedances.append(exceedance(
+            f"Low flow (< {low_flow_fraction:.0%} of median, {threshold:.3g})", flow < threshold, flow, hours, step_hours, np.min
+        ))
+
+    for name, label in (("chlorides_ppm", "Chlorides (ppm)"), ("temperature_c", "Temperature (°C)")):
+        if name in frame:
+            values = column(name)
+            summary.statistics[label] = {
+                "mean": round(float(np.nanmean(values)), 2),
+                "min": round(float(np.nanmin(values)), 2),
+                "max": round(float(np.nanmax(values)), 2)
+            }
+
+    for name in ("ph", "oxygen_ppb", "temperature_c", "dew_point_c"):
+        if name in frame:
+            values = column(name)
+            values = values[~np.isnan(values)]
+            if values.size:
+                summary.latest[name] = round(float(values[-1]), 3)
+
+    if not summary.exceedances and not summary.statistics:
+        raise ValueError("No chemistry columns recognised (expected pH, dissolved oxygen, chlorides, temperature or flow)")
+    return summary
+
+
+def summarize_file(source, name=None):
+    return analyze(read_history(source, name))
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        started = time.perf_counter()
+        summary = summarize_file(Path(path))
+        print(summary.to_prompt())
+        print(f"({time.perf_counter() - started:.2f} s)")
@@ -0,0 +1,76 @@
+from autogen_core.model_context import ChatCompletionContext
+from autogen_core.models import AssistantMessage, SystemMessage, UserMessage
+
+from config import env_int, env_str
+
+CONTEXT_POLICY = env_str("AGENT_CONTEXT_POLICY", "window")
+CONTEXT_WINDOW = env_int("AGENT_CONTEXT_WINDOW", 6)
+CONTEXT_TOKEN_BUDGET = env_int("AGENT_CONTEXT_TOKENS", 6000)
+CONTEXT_KEEP_LAST = env_int("AGENT_CONTEXT_KEEP_LAST", 3)
+
+SUMMARY_PROMPT = """
+Summarize the earlier part of this asset integrity conversation for another engineer.
+Keep asset tags, chemistry values, identified damage mechanisms and any recommendations.
+Answer in at most 150 words.
+"""
+
+
+class WindowedChatCompletionContext(ChatCompletionContext):
+    def __init__(self, window=None, initial_messages=None):
+        super().__init__(initial_messages)
+        self._window = window
+
+    @property
+    def messages(self):
+        return list(self._messages)
+
+    async def add_message(self, message):
+        await super().add_message(message)
+        if self._window is not None and len(self._messages) > self._window:
+            del self._messages[:-self._window]
+
+    async def get_messages(self):
+        return list(self._messages)
+
+
+class SummarizingChatCompletionContext(WindowedChatCompletionContext):
+    def __init__(self, model_client, token_budget, keep_last=CONTEXT_KEEP_LAST, initial_messages=None):
+        super().__init__(None, initial_messages)
+        self._model_client = model_client
+        self._token_budget = token_budget
+        self._keep_last = keep_last
+
+    async def get_messages(self):
+        if len(self._messages) <= self._keep_last:
+            return list(self._messages)
+        if self._model_client.count_tokens(self._messages) <= self._token_budget:
+            return list(self._messages)
+
+        older = self._messages[:-self._keep_last]
+        recent = self._messages[-self._keep_last:]
+        transcript = "\n\n".join(
+            f"{getattr(message, 'source', 'system')}: {message.content}"
+            for message in older
+            if isinstance(message.content, str)
+        )
+        # The shared client sets stream_options, which only streaming requests accept.
+        async for result in self._model_client.create_stream([
+            SystemMessage(content=SUMMARY_PROMPT),
+            UserMessage(content=transcript, source="user")
+        ]):
+            pass
+        self._messages = [
+            AssistantMessage(content=f"Summary of the earlier conversation:\n{result.content}", source="summary"),
+            *recent
+        ]
+        return list(self._messages)
+
+
+def build_model_context(model_client, policy=CONTEXT_POLICY):
+    if policy == "window":
+        return WindowedChatCompletionContext(CONTEXT_WINDOW)
+    if policy == "summary":
+        return SummarizingChatCompletionContext(model_client, CONTEXT_TOKEN_BUDGET)
+    if policy == "unbounded":
+        return WindowedChatCompletionContext()
+    raise ValueError(f"Unknown AGENT_CONTEXT_POLICY: {policy}")
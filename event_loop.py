@@ -0,0 +1,27 @@
+import asyncio
+import threading
+
+_loop = None
+_lock = threading.Lock()
+
+
+def get_event_loop():
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever,
+                name="agent-event-loop",
+                daemon=True
+            ).start()
+    return _loop
+
+
+def submit(coro):
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+
+
+def run(coro, timeout=None):
+    return submit(coro).result(timeout)
+
@@ -0,0 +1,38 @@
+import base64
+import hashlib
+import io
+from dataclasses import dataclass
+
+from PIL import Image, ImageOps
+
+from config import env_int
+
+THUMBNAIL_SIZE = env_int("IMAGE_THUMBNAIL_SIZE", 768)
+JPEG_QUALITY = env_int("IMAGE_JPEG_QUALITY", 80)
+
+
+@dataclass(frozen=True)
+class ProcessedImage:
+    digest: str
+    data: bytes
+    width: int
+    height: int
+    mime_type: str = "image/jpeg"
+
+    def to_base64(self):
+        return base64.b64encode(self.data).decode("ascii")
+
+
+def image_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def process_image(data, max_size=THUMBNAIL_SIZE):
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft("RGB", (max_size, max_size))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((max_size, max_size))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        width, height = image.size
+    return ProcessedImage(image_digest(data), buffer.getvalue(), width, height)
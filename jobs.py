@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+import uuid
+
+from config import env_int
+from event_loop import submit
+
+JOB_WORKERS = env_int("JOB_WORKERS", 32)
+
+
+class Job:
+    def __init__(self, label, states=None):
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.states = states
+        self.chunks = []
+        self.result = None
+        self.error = None
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.future = None
+        self._done = threading.Event()
+
+    @property
+    def status(self):
+        if self._done.is_set():
+            return "done"
+        return "running" if self.started is not None else "queued"
+
+    def done(self):
+        return self._done.is_set()
+
+    def text(self):
+        return "".join(self.chunks)
+
+
+class JobQueue:
+    def __init__(self, workers=JOB_WORKERS):
+        self.workers = workers
+        self.completed = 0
+        self._semaphore = asyncio.Semaphore(workers)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, label, stream, states=None):
+        job = Job(label, states)
+        with self._lock:
+            self._jobs[job.id] = job
+        job.future = submit(self._run(job, stream))
+        return job
+
+    async def _run(self, job, stream):
+        try:
+            async with self._semaphore:
+                job.started = time.monotonic()
+                async for chunk in stream:
+                    job.chunks.append(chunk)
+            job.result = job.text()
+        except asyncio.CancelledError:
+            job.error = "cancelled"
+            job.result = f"Error: {job.error}"
+            raise
+        except Exception as e:
+            job.error = str(e)
+            job.result = f"Error: {job.error}"
+        finally:
+            job.finished = time.monotonic()
+            with self._lock:
+                self._jobs.pop(job.id, None)
+                self.completed += 1
+            job._done.set()
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "completed": self.completed
+        }
+
+
+queue = JobQueue()
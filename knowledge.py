@@ -0,0 +1,154 @@
+import functools
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import env_int, env_str
+
+KNOWLEDGE_DIR = Path(env_str("KNOWLEDGE_DIR", Path(__file__).parent / "knowledge"))
+TOP_K = env_int("KNOWLEDGE_TOP_K", 4)
+
+SECTION_PATTERN = re.compile(r"^(\d+\.\d+(?:\.\d+)*)\s+(\S.*)$", re.M)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+
+MITIGATION_TITLES = ("prevention", "mitigation", "inspection", "monitoring", "related")
+
+SYNONYMS = {
+    "o2": "oxygen",
+    "do": "oxygen",
+    "dissolved": "oxygen",
+    "co2": "carbonic",
+    "flow": "velocity",
+    "temp": "temperature",
+    "chlorides": "chloride",
+    "condensate": "condensation",
+    "ph": "acid",
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "for", "from", "in", "is", "it",
+    "may", "of", "on", "or", "the", "to", "with", "e", "g", "i"
+}
+
+
+@dataclass(frozen=True)
+class Section:
+    number: str
+    title: str
+    mechanism: str
+    kind: str
+    text: str
+
+    def render(self):
+        return f"{self.number} {self.title}\n{self.text}".strip()
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if token in SYNONYMS:
+            tokens.append(SYNONYMS[token])
+    return tokens
+
+
+def section_kind(title):
+    title = title.lower()
+    if title.startswith("references"):
+        return "reference"
+    if any(word in title for word in MITIGATION_TITLES):
+        return "mitigation"
+    return "description"
+
+
+def split_sections(text):
+    matches = list(SECTION_PATTERN.finditer(text))
+    sections = []
+    mechanism = None
+    for i, match in enumerate(matches):
+        number, title = match.group(1), match.group(2).strip()
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        body = text[match.end():end].strip()
+        if number.count(".") == 1:
+            mechanism = f"{number} {title}"
+            continue
+        sections.append(Section(
+            number=number,
+            title=title,
+            mechanism=mechanism or number.rsplit(".", 1)[0],
+            kind=section_kind(title),
+            text=body
+        ))
+    return sections
+
+
+class KnowledgeIndex:
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self, sections):
+        self.sections = []
+        seen = set()
+        for section in sections:
+            if section.number not in seen:
+                seen.add(section.number)
+                self.sections.append(section)
+
+        self.term_counts = [Counter(tokenize(s.title + " " + s.text)) for s in self.sections]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+        document_frequency = Counter()
+        for counts in self.term_counts:
+            document_frequency.update(counts.keys())
+        total = len(self.sections)
+        self.idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    @classmethod
+    def from_directory(cls, directory=KNOWLEDGE_DIR, pattern="*.txt"):
+        sections = []
+        for path in sorted(Path(directory).glob(pattern)):
+            sections.extend(split_sections(path.read_text(encoding="utf-8")))
+        return cls(sections)
+
+    def score(self, position, query_terms):
+        counts = self.term_counts[position]
+        length_norm = self.k1 * (1 - self.b + self.b * self.lengths[position] / (self.avg_length or 1))
+        total = 0.0
+        for term in query_terms:
+            tf = counts.get(term, 0)
+            if tf:
+                total += self.idf[term] * tf * (self.k1 + 1) / (tf + length_norm)
+        return total
+
+    def search(self, query, k=TOP_K, kind=None, prefix=None):
+        query_terms = set(tokenize(query))
+        candidates = [
+            position for position, section in enumerate(self.sections)
+            if (kind is None or section.kind == kind)
+            and (prefix is None or section.number.startswith(prefix + "."))
+        ]
+        ranked = sorted(candidates, key=lambda position: (-self.score(position, query_terms), position))
+        return [self.sections[position] for position in sorted(ranked[:k])]
+
+
+@functools.lru_cache(maxsize=None)
+def get_index(mechanism=None):
+    if mechanism is None:
+        return KnowledgeIndex.from_directory()
+    return KnowledgeIndex.from_directory(pattern=f"api571_{mechanism}_*.txt")
+
+
+def build_context(query, kind=None, prefix=None, k=TOP_K):
+    mechanism = ".".join(prefix.split(".")[:2]) if prefix else None
+    sections = get_index(mechanism).search(query, k=k, kind=kind, prefix=prefix)
+    if not sections:
+        return ""
+    return "\n\n".join(section.render() for section in sections)
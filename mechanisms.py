@@ -0,0 +1,48 @@
+import re
+from dataclasses import dataclass
+
+from config import env_int, env_str
+
+DEFAULT_MECHANISM = env_str("DEFAULT_MECHANISM", "3.18")
+ROUTE_MARGIN = env_int("MECHANISM_ROUTE_MARGIN", 2)
+
+
+@dataclass(frozen=True)
+class Mechanism:
+    number: str
+    title: str
+    keywords: tuple
+
+    def score(self, text):
+        return sum(len(re.findall(rf"\b{re.escape(keyword)}\b", text)) for keyword in self.keywords)
+
+
+MECHANISMS = {
+    mechanism.number: mechanism
+    for mechanism in (
+        Mechanism("3.18", "CO2 Corrosion", (
+            "co2", "carbon dioxide", "carbonic", "sweet", "feco3", "iron carbonate", "mesa",
+            "produced water", "wet gas", "shift converter", "dew point"
+        )),
+        Mechanism("3.9", "Boiler Water and Steam Condensate Corrosion", (
+            "boiler", "boiler tube", "deaerator", "economizer", "hydrazine", "sulfite", "layup",
+            "oxygen pitting", "tubercle", "tubercles"
+        )),
+        Mechanism("3.12", "Carbonate Stress Corrosion Cracking", (
+            "carbonate cracking", "carbonate scc", "stress corrosion", "crack", "cracks", "cracking",
+            "pwht", "fcc", "sour water", "alkaline", "wfmt", "intergranular", "potassium carbonate"
+        )),
+    )
+}
+
+
+def get_mechanism(number=None):
+    return MECHANISMS.get(number) or MECHANISMS[DEFAULT_MECHANISM]
+
+
+def route(*texts):
+    text = " ".join(str(text) for text in texts if text).lower()
+    default = get_mechanism()
+    scores = {mechanism: mechanism.score(text) for mechanism in MECHANISMS.values()}
+    best = max(scores, key=lambda mechanism: (scores[mechanism], mechanism is default))
+    return best if scores[best] - scores[default] >= ROUTE_MARGIN else default
@@ -0,0 +1,211 @@
+import os
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from config import env_int, env_str
+
+METRICS_FILE = env_str("METRICS_FILE")
+METRICS_PORT = env_int("METRICS_PORT", 0)
+
+BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def lines(self, name, labels):
+        for bound, count in zip(BUCKETS, self.counts):
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.total:.6f}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class AgentStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.seconds = Histogram()
+
+
+class LookupStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.seconds = Histogram()
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.agents = defaultdict(AgentStats)
+        self.lookups = defaultdict(LookupStats)
+        self.stages = defaultdict(Histogram)
+        self.events = defaultdict(int)
+
+    def record_call(self, agent, seconds, prompt_tokens=0, completion_tokens=0, cache_hit=False, error=False):
+        with self._lock:
+            stats = self.agents[agent]
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.cache_hits += int(cache_hit)
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.seconds.observe(seconds)
+        export()
+
+    def record_lookup(self, source, seconds, hit):
+        with self._lock:
+            stats = self.lookups[source]
+            stats.hits += int(hit)
+            stats.misses += int(not hit)
+            stats.seconds.observe(seconds)
+        export()
+
+    def record_event(self, agent, event):
+        with self._lock:
+            self.events[agent, event] += 1
+        export()
+
+    def record_stage(self, stage, seconds):
+        with self._lock:
+            self.stages[stage].observe(seconds)
+        export()
+
+    def rows(self):
+        with self._lock:
+            return [
+                {
+                    "agent": agent,
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "cache hits": stats.cache_hits,
+                    "avg s": round(stats.seconds.total / stats.seconds.count, 2) if stats.seconds.count else 0.0,
+                    "prompt tokens": stats.prompt_tokens,
+                    "completion tokens": stats.completion_tokens
+                }
+                for agent, stats in sorted(self.agents.items())
+            ]
+
+    def lookup_rows(self):
+        with self._lock:
+            return [
+                {
+                    "source": source,
+                    "hits": stats.hits,
+                    "misses": stats.misses,
+                    "avg ms": round(stats.seconds.total * 1000 / stats.seconds.count, 2) if stats.seconds.count else 0.0
+                }
+                for source, stats in sorted(self.lookups.items())
+            ]
+
+    def stage_rows(self):
+        with self._lock:
+            return [
+                {
+                    "stage": stage,
+                    "runs": histogram.count,
+                    "avg s": round(histogram.total / histogram.count, 2) if histogram.count else 0.0
+                }
+                for stage, histogram in sorted(self.stages.items())
+            ]
+
+    def to_prometheus(self):
+        counters = (
+            ("asset_agent_calls_total", "Agent calls.", "calls"),
+            ("asset_agent_errors_total", "Agent calls that failed.", "errors"),
+            ("asset_agent_cache_hits_total", "Agent calls answered from the response cache.", "cache_hits"),
+            ("asset_agent_prompt_tokens_total", "Prompt tokens sent to the model.", "prompt_tokens"),
+            ("asset_agent_completion_tokens_total", "Completion tokens returned by the model.", "completion_tokens"),
+        )
+        lines = []
+        with self._lock:
+            for name, description, attribute in counters:
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} counter")
+                for agent, stats in sorted(self.agents.items()):
+                    lines.append(f'{name}{{agent="{agent}"}} {getattr(stats, attribute)}')
+
+            lines.append("# HELP asset_agent_resilience_events_total Timeouts, upstream errors, retries, hedges and fallbacks.")
+            lines.append("# TYPE asset_agent_resilience_events_total counter")
+            for (agent, event), count in sorted(self.events.items()):
+                lines.append(f'asset_agent_resilience_events_total{{agent="{agent}",event="{event}"}} {count}')
+
+            lines.append("# HELP asset_agent_call_seconds Wall time of agent calls.")
+            lines.append("# TYPE asset_agent_call_seconds histogram")
+            for agent, stats in sorted(self.agents.items()):
+                lines.extend(stats.seconds.lines("asset_agent_call_seconds", f'agent="{agent}"'))
+
+            lines.append("# HELP asset_lookups_total Local lookups that can answer without an agent call.")
+            lines.append("# TYPE asset_lookups_total counter")
+            for source, stats in sorted(self.lookups.items()):
+                lines.append(f'asset_lookups_total{{source="{source}",result="hit"}} {stats.hits}')
+                lines.append(f'asset_lookups_total{{source="{source}",result="miss"}} {stats.misses}')
+
+            lines.append("# HELP asset_lookup_seconds Wall time of local lookups.")
+            lines.append("# TYPE asset_lookup_seconds histogram")
+            for source, stats in sorted(self.lookups.items()):
+                lines.extend(stats.seconds.lines("asset_lookup_seconds", f'source="{source}"'))
+
+            lines.append("# HELP asset_stage_seconds Wall time of conversation stage transitions.")
+            lines.append("# TYPE asset_stage_seconds histogram")
+            for stage, histogram in sorted(self.stages.items()):
+                lines.extend(histogram.lines("asset_stage_seconds", f'stage="{stage}"'))
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def export(path=METRICS_FILE):
+    if not path:
+        return
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(path.suffix + f".{os.getpid()}.{threading.get_ident()}.tmp")
+    temporary.write_text(metrics.to_prometheus(), encoding="utf-8")
+    os.replace(temporary, path)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_lock = threading.Lock()
+
+
+def start_server(port=METRICS_PORT):
+    global _server
+    with _lock:
+        if _server is None and port:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
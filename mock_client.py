@@ -0,0 +1,148 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from autogen_core.models import ChatCompletionClient, CreateResult, ModelFamily, RequestUsage, SystemMessage
+
+from config import env_float, env_str
+
+DEFAULT_REPLIES = {
+    "Asset Management": """Asset {last_message} Details:
+
+- Equipment: Flowserve centrifugal pump
+- Tag: {last_message}
+- Standard: API 610
+- Material: CF8M
+- Service: Produced water / condensate
+- Normal temperature: 65–85 °C
+- Last overhaul: 4 months ago
+
+Before assessing, could you upload a photo of the corroded area?""",
+    "photo analysis": """Preliminary Assessment Based on Image
+
+- Presence of iron carbonate (FeCO₃) scale deposits
+- Localized grooving or channeling along flow direction (flow-assisted sweet corrosion)
+- Uniform or mesa-type attack in areas with unstable FeCO₃ film
+
+To confirm the mechanism, I'll need chemistry and process data for the last 3–6 months.""",
+    "reasoning agent": """Thank you for the chemistry data.
+
+1. Oxygen contamination above 10 ppb accelerating CO2 corrosion.
+2. Condensate pH below 6 from dissolved CO2.
+3. Low-flow periods allowing a separate water phase.
+
+The most likely contributor is oxygen contamination.
+
+Do you need the mitigation or prevention steps for the above problem?""",
+    "mitigation agent": """1. Increase condensate pH above 6 through improved water treatment.
+2. Restore oxygen scavenger dosing and nitrogen blanketing after maintenance.
+
+Do you need the location of the pump in 3D plant model?""",
+}
+
+
+class MockChatCompletionClient(ChatCompletionClient):
+    def __init__(self, latency=0.0, tokens_per_second=0.0, replies=None, default_reply="OK"):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.replies = dict(DEFAULT_REPLIES if replies is None else replies)
+        self.default_reply = default_reply
+        self.calls = 0
+        self.busy_seconds = 0.0
+        self._total_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self._actual_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+
+    @classmethod
+    def from_env(cls):
+        replies = None
+        replies_path = env_str("MOCK_LLM_REPLIES")
+        if replies_path:
+            replies = json.loads(Path(replies_path).read_text(encoding="utf-8"))
+        return cls(
+            latency=env_float("MOCK_LLM_LATENCY", 0.0),
+            tokens_per_second=env_float("MOCK_LLM_TOKENS_PER_SECOND", 0.0),
+            replies=replies
+        )
+
+    def reply_for(self, messages):
+        system = " ".join(m.content for m in messages if isinstance(m, SystemMessage))
+        last = messages[-1].content if messages else ""
+        if not isinstance(last, str):
+            last = " ".join(part for part in last if isinstance(part, str))
+        for keyword, reply in self.replies.items():
+            if keyword.lower() in system.lower():
+                return reply.replace("{last_message}", last.strip().splitlines()[-1] if last.strip() else "")
+        return self.default_reply
+
+    def _usage(self, messages, reply):
+        usage = RequestUsage(
+            prompt_tokens=self.count_tokens(messages),
+            completion_tokens=len(reply.split())
+        )
+        self.calls += 1
+        self._actual_usage = RequestUsage(
+            prompt_tokens=self._actual_usage.prompt_tokens + usage.prompt_tokens,
+            completion_tokens=self._actual_usage.completion_tokens + usage.completion_tokens
+        )
+        self._total_usage = self._actual_usage
+        return usage
+
+    async def create(self, messages, *, tools=[], tool_choice="auto", json_output=None, extra_create_args={}, cancellation_token=None):
+        started = time.perf_counter()
+        reply = self.reply_for(messages)
+        await asyncio.sleep(self.latency)
+        if self.tokens_per_second:
+            await asyncio.sleep(len(reply.split()) / self.tokens_per_second)
+        self.busy_seconds += time.perf_counter() - started
+        return CreateResult(
+            finish_reason="stop",
+            content=reply,
+            usage=self._usage(messages, reply),
+            cached=False
+        )
+
+    async def create_stream(self, messages, *, tools=[], tool_choice="auto", json_output=None, extra_create_args={}, cancellation_token=None):
+        started = time.perf_counter()
+        reply = self.reply_for(messages)
+        await asyncio.sleep(self.latency)
+        for i, word in enumerate(reply.split(" ")):
+            if self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield word if i == 0 else " " + word
+        self.busy_seconds += time.perf_counter() - started
+        yield CreateResult(
+            finish_reason="stop",
+            content=reply,
+            usage=self._usage(messages, reply),
+            cached=False
+        )
+
+    async def close(self):
+        pass
+
+    def actual_usage(self):
+        return self._actual_usage
+
+    def total_usage(self):
+        return self._total_usage
+
+    def count_tokens(self, messages, *, tools=[]):
+        return sum(len(str(message.content)) for message in messages) // 4
+
+    def remaining_tokens(self, messages, *, tools=[]):
+        return 128000 - self.count_tokens(messages)
+
+    @property
+    def capabilities(self):
+        return self.model_info
+
+    @property
+    def model_info(self):
+        return {
+            "vision": True,
+            "function_calling": False,
+            "json_output": False,
+            "family": ModelFamily.UNKNOWN,
+            "structured_output": False
+        }
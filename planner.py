@@ -0,0 +1,65 @@
+import re
+from dataclasses import dataclass
+
+from asset_registry import TAG_PATTERN, get_registry
+
+STAGES = (
+    "initial",
+    "awaiting_photo",
+    "awaiting_chemistry_data",
+    "awaiting_mitigation_request",
+    "awaiting_3d_model_request",
+    "completed",
+)
+
+NEXT_STAGE = {
+    "asset": "awaiting_photo",
+    "photo": "awaiting_chemistry_data",
+    "chemistry": "awaiting_mitigation_request",
+}
+
+CHEMISTRY_PATTERN = re.compile(
+    r"\b(ph|chlorides?|dissolved oxygen|oxygen|o2|co2|temp|temperature|flow|inhibitor|scavenger|conductivity)\b"
+    r"\s*(?:of|at|is|was|=|:)?\s*[<>~]?\s*-?\d"
+    r"|(?<![\w.])-?\d+(?:\.\d+)?\s*(ppm|ppb|°c|°f|mg/l|µs/cm|us/cm)(?!\w)",
+    re.I
+)
+MIN_CHEMISTRY_TERMS = 2
+
+
+def is_chemistry(text):
+    terms = {(term or unit).lower() for term, unit in CHEMISTRY_PATTERN.findall(text or "")}
+    return len(terms) >= MIN_CHEMISTRY_TERMS
+
+
+def find_tag(text):
+    candidates = TAG_PATTERN.findall(text)
+    registry = get_registry()
+    return next((tag for tag in candidates if re.search(r"[A-Za-z]", tag) or registry.get(tag) is not None), None)
+
+
+@dataclass
+class Plan:
+    tag: str = None
+    photos: tuple = ()
+    chemistry: str = None
+
+    def steps(self):
+        return [step for step, value in (("asset", self.tag), ("photo", self.photos), ("chemistry", self.chemistry)) if value]
+
+    def next_stage(self, stage):
+        steps = self.steps()
+        if not steps:
+            return stage
+        target = NEXT_STAGE[steps[-1]]
+        return target if STAGES.index(target) > STAGES.index(stage) else stage
+
+
+def plan_turn(stage, text, photos=()):
+    text = (text or "").strip()
+    plan = Plan(photos=tuple(photos))
+    if stage == "awaiting_chemistry_data" and text or stage in ("initial", "awaiting_photo") and is_chemistry(text):
+        plan.chemistry = text
+    if stage == "initial" and text:
+        plan.tag = find_tag(text) if plan.chemistry else text
+    return plan
@@ -0,0 +1,165 @@
+import asyncio
+import functools
+import random
+import threading
+import time
+from collections import defaultdict, deque
+
+from config import env_flag, env_float, env_int
+from metrics import metrics
+
+AGENT_TIMEOUT = env_float("AGENT_TIMEOUT", 60.0)
+AGENT_RETRIES = env_int("AGENT_RETRIES", 2)
+RETRY_BASE = env_float("AGENT_RETRY_BASE", 0.5)
+RETRY_MAX = env_float("AGENT_RETRY_MAX", 8.0)
+HEDGE_ENABLED = env_flag("AGENT_HEDGE")
+HEDGE_QUANTILE = env_float("AGENT_HEDGE_QUANTILE", 0.95)
+HEDGE_MIN_SAMPLES = env_int("AGENT_HEDGE_MIN_SAMPLES", 20)
+BREAKER_FAILURES = env_int("BREAKER_FAILURES", 5)
+BREAKER_RESET = env_float("BREAKER_RESET", 30.0)
+
+
+@functools.lru_cache(maxsize=None)
+def retryable():
+    import openai
+    return (
+        TimeoutError,
+        ConnectionError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def agent_timeout(agent_name):
+    return env_float(f"AGENT_TIMEOUT_{agent_name.upper()}", AGENT_TIMEOUT)
+
+
+def backoff(attempt):
+    return random.uniform(0, min(RETRY_MAX, RETRY_BASE * 2 ** (attempt - 1)))
+
+
+def describe(error, agent_name):
+    if isinstance(error, TimeoutError):
+        return f"{agent_name} timed out after {agent_timeout(agent_name):g} s"
+    return str(error) or type(error).__name__
+
+
+class LatencyTracker:
+    def __init__(self, size=200):
+        self._samples = defaultdict(lambda: deque(maxlen=size))
+        self._lock = threading.Lock()
+
+    def observe(self, agent_name, seconds):
+        with self._lock:
+            self._samples[agent_name].append(seconds)
+
+    def quantile(self, agent_name, q=HEDGE_QUANTILE):
+        with self._lock:
+            samples = sorted(self._samples[agent_name])
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+class CircuitBreaker:
+    def __init__(self, failures=BREAKER_FAILURES, reset_after=BREAKER_RESET):
+        self.failures = failures
+        self.reset_after = reset_after
+        self.consecutive = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            return self.state != "open"
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive += 1
+            if self.state == "half-open" or self.consecutive >= self.failures:
+                self.opened_at = time.monotonic()
+
+
+latencies = LatencyTracker()
+breakers = defaultdict(CircuitBreaker)
+
+
+async def hedged(agent_name, attempt, discard=None):
+    delay = latencies.quantile(agent_name) if HEDGE_ENABLED else None
+    if delay is None:
+        return await attempt()
+
+    tasks = [asyncio.ensure_future(attempt())]
+    winner = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            metrics.record_event(agent_name, "hedge")
+            tasks.append(asyncio.ensure_future(attempt()))
+        pending = set(tasks)
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((task for task in tasks if task in done and task.exception() is None), None)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+    if winner is None:
+        raise tasks[0].exception()
+    for task in tasks:
+        if task is not winner and task.done() and not task.cancelled() and task.exception() is None and discard:
+            await discard(task.result())
+    return winner.result()
+
+
+async def call(agent_name, attempt, clients, discard=None, deadline=None):
+    loop = asyncio.get_running_loop()
+    if deadline is None:
+        deadline = loop.time() + agent_timeout(agent_name)
+    error = CircuitOpenError(f"{agent_name}: no model available (circuit open)")
+    for position, (label, client) in enumerate(clients):
+        breaker = breakers[label]
+        for retry in range(AGENT_RETRIES + 1):
+            if loop.time() >= deadline:
+                raise TimeoutError(f"{agent_name} deadline exceeded")
+            if not breaker.allow():
+                break
+            if position and not retry:
+                metrics.record_event(agent_name, "fallback")
+            if retry:
+                metrics.record_event(agent_name, "retry")
+                await asyncio.sleep(min(backoff(retry), max(deadline - loop.time(), 0)))
+            started = time.perf_counter()
+            try:
+                result = await hedged(
+                    agent_name,
+                    lambda: asyncio.wait_for(attempt(client), max(deadline - loop.time(), 0)),
+                    discard
+                )
+            except retryable() as e:
+                metrics.record_event(agent_name, "timeout" if isinstance(e, TimeoutError) else "upstream_error")
+                breaker.record_failure()
+                error = e
+                continue
+            breaker.record_success()
+            latencies.observe(agent_name, time.perf_counter() - started)
+            return result
+    raise error
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from config import env_flag, env_int, env_str
+
+CACHE_ENABLED = env_flag("RESPONSE_CACHE", True)
+CACHE_PATH = Path(env_str("RESPONSE_CACHE_PATH", ".cache/responses.sqlite3"))
+CACHE_SIZE = env_int("RESPONSE_CACHE_SIZE", 512)
+
+
+def digest(value):
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def cache_key(agent_name, system_message, model, context, message):
+    return digest(json.dumps(
+        [agent_name, digest(system_message), model, context, message],
+        sort_keys=True,
+        default=str
+    ))
+
+
+class ResponseCache:
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def _remember(self, key, response):
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            response = self._entries.get(key)
+            if response is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT response FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    response = row[0]
+            if response is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, response)
+            return response
+
+    def put(self, key, response):
+        with self._lock:
+            self._remember(key, response)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response) VALUES (?, ?)",
+                    (key, response)
+                )
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries)
+            }
+
+
+_cache = None
+_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _lock:
+        if _cache is None and CACHE_ENABLED:
+            _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,251 @@
+import argparse
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from asset_registry import get_registry, normalize_tag
+from chemistry_engine import COLUMN_ALIASES as CHEMISTRY_ALIASES, DEW_POINT_C, OXYGEN_LIMIT_PPB, PH_LIMIT, normalize_columns
+from config import env_float
+from thickness import get_thickness_store
+
+REFERENCE_LIFE_YEARS = env_float("RISK_REFERENCE_LIFE_YEARS", 10.0)
+
+MATERIAL_SUSCEPTIBILITY = (
+    (re.compile(r"\b(?:30[49]|31[0267]|321|347)[lh]?\b|300 series|austenitic|duplex|\b(?:alloy ?)?(?:625|825|c-?276)\b|inconel|incoloy|hastelloy", re.I), 0.05),
+    (re.compile(r"\b(?:1[23] ?% ?cr|1[23] ?cr|40[59]|410s?|420|430)\b|400 series|martensitic|ferritic stainless", re.I), 0.2),
+    (re.compile(r"\b(?:stainless|ss)\b", re.I), 0.2),
+)
+DEFAULT_SUSCEPTIBILITY = 1.0
+
+SERVICE_CONSEQUENCE = (
+    (re.compile(r"\b(?:h2s|sour|hydrogen sulfide|toxic|hf|hydrofluoric|chlorine|phenol)\b", re.I), 5),
+    (re.compile(r"\b(?:hydrogen|h2|syngas|lpg|propane|butane|ethylene|fuel gas|natural gas|hydrocarbon|naphtha|crude|gasoline|flammable)\b", re.I), 4),
+    (re.compile(r"\b(?:amine|mea|mdea|dea|caustic|acid|co2|carbon dioxide|ammonia)\b", re.I), 3),
+    (re.compile(r"\b(?:steam|condensate|bfw|boiler feed|hot water)\b", re.I), 2),
+    (re.compile(r"\b(?:cooling water|water|air|nitrogen|n2)\b", re.I), 1),
+)
+DEFAULT_CONSEQUENCE = 3
+
+POF_BANDS = (0.5, 1.0, 2.0, 4.0)
+RISK_LEVELS = ((15, "high", 1.0), (8, "medium-high", 3.0), (4, "medium", 5.0), (0, "low", 10.0))
+
+CHEMISTRY_COLUMNS = ("ph", "oxygen_ppb", "temperature_c", "dew_point_c")
+TAG_ALIASES = ("tag", "tag_id", "asset_tag", "tag_number", "asset_number")
+
+
+def classify(texts, rules, default):
+    texts = pd.Series(texts, dtype=object).fillna("").astype(str)
+    values = np.full(len(texts), default, dtype=np.float64)
+    assigned = np.zeros(len(texts), dtype=bool)
+    for pattern, value in rules:
+        matches = texts.str.contains(pattern).to_numpy() & ~assigned
+        values[matches] = value
+        assigned |= matches
+    return values
+
+
+def environment_factor(ph, oxygen, temperature, dew_point):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        acidity = np.where(ph < PH_LIMIT, 1.0 + (PH_LIMIT - ph), 1.0)
+        oxygenation = np.where(oxygen > OXYGEN_LIMIT_PPB, 1.0 + np.log10(oxygen / OXYGEN_LIMIT_PPB), 1.0)
+    dew_point = np.where(np.isnan(dew_point), DEW_POINT_C, dew_point)
+    unknown = np.isnan(temperature) | np.isnan(dew_point)
+    condensing = np.where(unknown, 1.0, np.where(temperature < dew_point, 1.5, 0.75))
+    return acidity * oxygenation * condensing
+
+
+def risk_level(risk):
+    conditions = [risk >= threshold for threshold, _, _ in RISK_LEVELS]
+    return (
+        np.select(conditions, [level for _, level, _ in RISK_LEVELS], "low").astype(object),
+        np.select(conditions, [interval for _, _, interval in RISK_LEVELS], RISK_LEVELS[-1][2])
+    )
+
+
+def read_chemistry(frame):
+    frame = normalize_columns(frame, {"tag": TAG_ALIASES, **CHEMISTRY_ALIASES})
+    if "tag" not in frame:
+        raise ValueError("Chemistry data needs a tag column to rank assets")
+    if "timestamp" in frame:
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"], errors="coerce")
+        frame = frame.sort_values("timestamp", kind="stable")
+    frame["tag"] = frame["tag"].map(normalize_tag)
+    return frame.drop_duplicates("tag", keep="last").set_index("tag")
+
+
+class RiskEngine:
+    def __init__(self, registry=None, thickness=None):
+        self.registry = registry or get_registry()
+        self.thickness = thickness or get_thickness_store()
+        self._lock = threading.Lock()
+        self._thickness_rows = 0
+        self.tags = []
+        self._rows = {}
+        self.assets = pd.DataFrame(columns=["tag", "equipment", "material", "service"])
+        self.values = {}
+
+    def load(self):
+        assets = self.registry.all()
+        with self._lock:
+            self.tags = [normalize_tag(asset.tag) for asset in assets]
+            self._rows = {tag: row for row, tag in enumerate(self.tags)}
+            self.assets = pd.DataFrame({
+                "tag": [asset.tag for asset in assets],
+                "equipment": [asset.equipment for asset in assets],
+                "material": [asset.material for asset in assets],
+                "service": [asset.service for asset in assets],
+            })
+            size = len(self.tags)
+            self.values = {
+                "susceptibility": classify(self.assets["material"], MATERIAL_SUSCEPTIBILITY, DEFAULT_SUSCEPTIBILITY),
+                "cof": classify(self.assets["service"], SERVICE_CONSEQUENCE, DEFAULT_CONSEQUENCE).astype(np.int64),
+                **{name: np.full(size, np.nan) for name in CHEMISTRY_COLUMNS},
+                "governing_mpy": np.full(size, np.nan),
+                "remaining_life_years": np.full(size, np.nan),
+                "thickness_fraction": np.full(size, np.nan),
+                **{name: np.zeros(size) for name in ("environment", "pof_index", "inspection_interval_years")},
+                **{name: np.zeros(size, dtype=np.int64) for name in ("pof", "risk")},
+                "risk_level": np.full(size, "low", dtype=object),
+            }
+            self._thickness_rows = self.thickness.count()
+            self._apply_thickness(self.thickness.tag_rates())
+            self._score(np.arange(size))
+        return self
+
+    def _apply_thickness(self, rates):
+        rows, found = self._rows_for(rates.index)
+        for name in ("governing_mpy", "remaining_life_years", "thickness_fraction"):
+            self.values[name][rows] = rates[name].to_numpy()[found]
+        return rows
+
+    def _rows_for(self, tags):
+        rows = np.array([self._rows.get(tag, -1) for tag in tags], dtype=np.int64)
+        found = rows >= 0
+        return rows[found], found
+
+    def _score(self, rows):
+        values = self.values
+        environment = environment_factor(*(values[name][rows] for name in CHEMISTRY_COLUMNS))
+        predicted = values["susceptibility"][rows] * environment
+        life = values["remaining_life_years"][rows]
+        with np.errstate(divide="ignore"):
+            measured = np.where(np.isnan(life), np.nan, REFERENCE_LIFE_YEARS / np.maximum(life, 0.1))
+        pof_index = np.fmax(predicted, measured)
+        pof = np.digitize(pof_index, POF_BANDS) + 1
+        risk = pof * values["cof"][rows]
+        level, interval = risk_level(risk)
+
+        values["environment"][rows] = environment
+        values["pof_index"][rows] = pof_index
+        values["pof"][rows] = pof
+        values["risk"][rows] = risk
+        values["risk_level"][rows] = level
+        values["inspection_interval_years"][rows] = np.fmin(interval, life / 2)
+
+    def set_chemistry(self, frame):
+        chemistry = read_chemistry(frame)
+        with self._lock:
+            rows, found = self._rows_for(chemistry.index)
+            for name in CHEMISTRY_COLUMNS:
+                if name in chemistry:
+                    self.values[name][rows] = pd.to_numeric(chemistry[name], errors="coerce").to_numpy(dtype=np.float64)[found]
+            self._score(rows)
+        return len(rows)
+
+    def update(self, tags):
+        keys = {normalize_tag(tag) for tag in tags}
+        if any(key not in self._rows for key in keys) or self.registry.count() != len(self.tags):
+            self.load()
+            return len(keys)
+        assets = [self.registry.get(key) for key in keys]
+        rates = self.thickness.tag_rates(keys)
+        with self._lock:
+            rows, _ = self._rows_for(keys)
+            materials = [asset.material if asset else "" for asset in assets]
+            services = [asset.service if asset else "" for asset in assets]
+            self.values["susceptibility"][rows] = classify(materials, MATERIAL_SUSCEPTIBILITY, DEFAULT_SUSCEPTIBILITY)
+            self.values["cof"][rows] = classify(services, SERVICE_CONSEQUENCE, DEFAULT_CONSEQUENCE)
+            self.assets.loc[rows, "material"] = materials
+            self.assets.loc[rows, "service"] = services
+            for name in ("governing_mpy", "remaining_life_years", "thickness_fraction"):
+                self.values[name][rows] = np.nan
+            self._apply_thickness(rates)
+            self._score(rows)
+        return len(rows)
+
+    def refresh(self):
+        if self.registry.count() != len(self.tags):
+            self.load()
+            return len(self.tags)
+        rows = self.thickness.count()
+        if rows == self._thickness_rows:
+            return 0
+        tags = self.thickness.tags_since(self._thickness_rows)
+        self._thickness_rows = rows
+        with self._lock:
+            changed = self._apply_thickness(self.thickness.tag_rates(tags))
+            self._score(changed)
+        return len(changed)
+
+    def ranked(self, limit=None):
+        with self._lock:
+            values = {name: column.copy() for name, column in self.values.items()}
+            frame = self.assets.copy()
+        order = np.lexsort((-values["pof_index"], np.nan_to_num(values["remaining_life_years"], nan=np.inf), -values["risk"]))
+        if limit is not None:
+            order = order[:limit]
+        frame = frame.iloc[order].reset_index(drop=True)
+        for name in (
+            "risk", "risk_level", "pof", "cof", "pof_index", "susceptibility", "environment", "governing_mpy",
+            "remaining_life_years", "thickness_fraction", "inspection_interval_years"
+        ):
+            frame[name] = values[name][order]
+        frame.insert(0, "rank", np.arange(1, len(frame) + 1))
+        return frame.round(3)
+
+    def export(self, path, limit=None):
+        frame = self.ranked(limit)
+        if str(path).lower().endswith(".json"):
+            frame.to_json(path, orient="records", indent=2)
+        else:
+            frame.to_csv(path, index=False)
+        return len(frame)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_risk_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = RiskEngine().load()
+    return _engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank every registry asset by API 580/581-style risk.")
+    parser.add_argument("-o", "--output", default="inspection_priorities.csv", help="CSV or JSON inspection-priority export")
+    parser.add_argument("--chemistry", action="append", default=[], help="CSV or Parquet with the latest chemistry per tag")
+    parser.add_argument("--top", type=int, default=20, help="rows to print")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    engine = get_risk_engine()
+    for path in args.chemistry:
+        frame = pd.read_parquet(path) if path.lower().endswith((".parquet", ".pq")) else pd.read_csv(path)
+        print(f"{path}: chemistry for {engine.set_chemistry(frame):,} assets")
+    exported = engine.export(args.output)
+    print(engine.ranked(args.top).to_string(index=False))
+    print(f"{exported:,} assets ranked and written to {Path(args.output)} ({time.perf_counter() - started:.2f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
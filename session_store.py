@@ -0,0 +1,124 @@
+import base64
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from config import env_str
+
+SESSION_STORE = env_str("SESSION_STORE", "sqlite")
+SESSION_STORE_PATH = Path(env_str("SESSION_STORE_PATH", "data/sessions"))
+
+
+def encode(value):
+    def default(obj):
+        if isinstance(obj, (bytes, bytearray)):
+            return {"__bytes__": base64.b64encode(obj).decode("ascii")}
+        raise TypeError(f"Cannot persist {type(obj).__name__}")
+    return json.dumps(value, default=default, separators=(",", ":"))
+
+
+def decode(payload):
+    def object_hook(obj):
+        if len(obj) == 1 and "__bytes__" in obj:
+            return base64.b64decode(obj["__bytes__"])
+        return obj
+    return json.loads(payload, object_hook=object_hook)
+
+
+class SQLiteSessionStore:
+    def __init__(self, path=SESSION_STORE_PATH.with_suffix(".sqlite3")):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                message TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            );
+        """)
+
+    def load(self, session_id):
+        with self._lock:
+            row = self._db.execute("SELECT state FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            messages = self._db.execute(
+                "SELECT message FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        return [decode(message) for message, in messages], decode(row[0])
+
+    def save(self, session_id, new_messages, start, state):
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO messages (session_id, seq, message) VALUES (?, ?, ?)",
+                [(session_id, start + i, encode(message)) for i, message in enumerate(new_messages)]
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, state, updated) VALUES (?, ?, ?)",
+                (session_id, encode(state), time.time())
+            )
+
+
+class LogSessionStore:
+    def __init__(self, root=SESSION_STORE_PATH):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, session_id):
+        return self.root / f"{session_id}.jsonl"
+
+    def load(self, session_id):
+        path = self._path(session_id)
+        if not path.exists():
+            return None
+        messages, state = {}, None
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = decode(line)
+                except json.JSONDecodeError:
+                    break
+                if record["type"] == "message":
+                    messages[record["seq"]] = record["message"]
+                else:
+                    state = record["state"]
+        if state is None:
+            return None
+        return [messages[seq] for seq in sorted(messages)], state
+
+    def save(self, session_id, new_messages, start, state):
+        records = [
+            {"type": "message", "seq": start + i, "message": message}
+            for i, message in enumerate(new_messages)
+        ]
+        records.append({"type": "state", "state": state})
+        with self._lock, self._path(session_id).open("a", encoding="utf-8") as f:
+            f.write("".join(encode(record) + "\n" for record in records))
+
+
+BACKENDS = {
+    "sqlite": SQLiteSessionStore,
+    "log": LogSessionStore,
+}
+
+_store = None
+_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _lock:
+        if _store is None and SESSION_STORE in BACKENDS:
+            _store = BACKENDS[SESSION_STORE]()
+    return _store
@@ -0,0 +1,99 @@
+import asyncio
+import copy
+import threading
+import time
+from collections import deque
+
+from agents import get_agent_response, stream_agent_response
+from config import env_flag, env_int
+from event_loop import submit
+
+SPECULATIVE_PREFETCH = env_flag("SPECULATIVE_PREFETCH")
+MAX_IN_FLIGHT = env_int("SPECULATIVE_MAX_IN_FLIGHT", 8)
+MAX_PER_HOUR = env_int("SPECULATIVE_MAX_PER_HOUR", 200)
+
+
+class SpeculationBudget:
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, max_per_hour=MAX_PER_HOUR):
+        self.max_in_flight = max_in_flight
+        self.max_per_hour = max_per_hour
+        self.in_flight = 0
+        self.used = 0
+        self.discarded = 0
+        self.rejected = 0
+        self._started = deque()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            while self._started and now - self._started[0] > 3600:
+                self._started.popleft()
+            if self.in_flight >= self.max_in_flight or len(self._started) >= self.max_per_hour:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            self._started.append(now)
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def settle(self, used):
+        with self._lock:
+            if used:
+                self.used += 1
+            else:
+                self.discarded += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "used": self.used,
+                "discarded": self.discarded,
+                "rejected": self.rejected,
+                "started_last_hour": len(self._started)
+            }
+
+
+budget = SpeculationBudget()
+
+
+class Speculation:
+    def __init__(self, spec, message, states):
+        self.spec = spec
+        self.message = message
+        self.states = states
+        self.future = submit(get_agent_response(spec, states, message))
+        self.future.add_done_callback(lambda _: budget.release())
+
+    def result(self, timeout=None):
+        response = self.future.result(timeout)
+        budget.settle(used=True)
+        return response, self.states.get(self.spec.name)
+
+    async def reply(self, states):
+        await asyncio.wrap_future(self.future)
+        response, state = self.result()
+        if response.startswith("Error:"):
+            async for chunk in stream_agent_response(self.spec, states, self.message):
+                yield chunk
+            return
+        if state is not None:
+            states[self.spec.name] = state
+        yield response
+
+    def cancel(self):
+        self.future.cancel()
+        budget.settle(used=False)
+
+
+def speculate(spec, states, message):
+    if not SPECULATIVE_PREFETCH or not budget.try_acquire():
+        return None
+    speculative_states = {}
+    if spec.name in states:
+        speculative_states[spec.name] = copy.deepcopy(states[spec.name])
+    return Speculation(spec, message, speculative_states)
@@ -1,99 +1,52 @@
 from dotenv import load_dotenv
-from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.messages import TextMessage
-from autogen_ext.models.openai import OpenAIChatCompletionClient
 import streamlit as st
-import asyncio
+from streamlit.errors import StreamlitAPIException
+import logging
+import os
+import re
+import threading
+import time
+import uuid
 from pathlib import Path
 import base64
+import copy
+import pandas as pd
+from agents import (
+    ASSET_AGENT,
+    MITIGATION_REQUEST,
+    PHOTO_AGENT,
+    PHOTO_UPLOADED,
+    mitigation_agent,
+    solution_agent,
+    stream_agent_response
+)
+from asset_registry import PHRASE_WITH_LLM, get_registry, registry_prompt
+from chemistry_engine import ChemistrySummary, summarize_file
+from config import env_flag, env_float, env_int
+from images import process_image
+from jobs import queue as jobs
+from mechanisms import get_mechanism, route
+from metrics import metrics, start_server
+from planner import plan_turn
+from response_cache import get_cache
+from risk import get_risk_engine
+from session_store import get_store
+from speculation import SPECULATIVE_PREFETCH, budget, speculate
+from thickness import get_thickness_store, thickness_prompt
+from video_delivery import VIDEO_DIR, video_source
+from work_orders import session_orders, to_csv
+from warmup import WARM_UP, timings as warm_up_timings, warm_up
 
 load_dotenv()
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"))
+start_server()
 
-knowledge_description = """
-3.18 CO2 Corrosion
-3.18.1 Description of Damage
-CO2 corrosion results when CO2 dissolves in water to form carbonic acid (H2CO3). The acid may lower the pH,
-and sufficient quantities may promote general corrosion and/or pitting corrosion of carbon steel.
-3.18.2 Affected Materials
-Carbon steel and low-alloy steels are affected. Increasing the level of chromium in steels offers no major
-improvement in resistance until a minimum of 12 % Cr is reached, i.e. Type 410 SS. 300 series austenitic SS is
-highly resistant to CO2 corrosion.
-3.18.3 Critical Factors
-a) Liquid water must be present for CO2 corrosion to occur. Beyond that, the partial pressure of CO2, pH,
-temperature, oxygen contamination, and velocity are critical factors.
-b) Increasing partial pressures of CO2 result in lower pH and, therefore, higher rates of corrosion.
-c) Corrosion occurs in the liquid water phase, often at locations where CO2 condenses from the vapor phase.
-d) Increasing temperatures increase corrosion rate up to the point where CO2 is driven off.
-e) Oxygen can accelerate corrosion rates. Oxygen should be limited to 10 ppb to avoid accelerating corrosion
-f) High velocity and turbulence can cause accelerated, localized corrosion.
-3.18.4 Affected Units or Equipment
-a) BFW and condensate systems in all units are affected.
-b) Effluent gas streams off the shift converters in hydrogen plants can be affected. Corrosion usually occurs
-when the effluent stream drops below the dew point at approximately 300 °F (150 °C). Corrosion rates as
-high as 1000 mpy have been observed.
-c) Overhead systems of regenerators in CO2 removal plants are affected.
-d) Stripping steam is commonly used in crude towers, and so CO2 corrosion can occur in the overhead system
-where the dew point is reached.
-e) Locations where high velocity, impingement, or turbulence can create increased susceptibility include areas
-downstream of control valves, and changes in piping direction (e.g. at elbows and tees) or piping diameter
-(i.e. at reducers).
-f) Corrosion may occur along the bottom surface of a pipe if there is a separate water phase or along the top
-surface of a pipe if condensation in wet gas systems occurs.
-g) Locations where a cooling effect can cause condensation and resultant CO2 (carbonic acid) corrosion include
-where insulation is damaged, where portions of blind flanged nozzles extend beyond the insulation and thus
-cool below the dew point, and where pipe supports attach to piping. (Figure 3-18-1 and Figure 3-18-2)
-3.18.5 Appearance or Morphology of Damage
-a) The appearance can differ depending on the unit and equipment in which it occurs (steam and condensate
-systems vs H2 manufacturing units vs crude tower overheads vs CO2 removal plants vs oilfield production
-equipment). Contributing to the differences in appearance are the type of water (BFW or steam condensate
-vs untreated fresh water vs salt water or brine) and the other species in the water, e.g. oxygen, H2S, and
-other acids and salts.
-b) Localized general thinning and/or pitting corrosion normally occurs in carbon steel. (Figure 3-18-3 to Figure
-3-18-5)
-c) Corrosion generally occurs or is worse in areas of turbulence and impingement. It is sometimes seen at the
-root of piping welds.
- Carbon steel may suffer deep pitting, grooving, or smooth "wash out" in areas of turbulence.
-d) Corrosion may initiate where water first condenses and may be most severe at water/vapor interfaces.
-e) It may appear as a number of flat-bottomed pits, sometimes called "mesa"-type pitting. (Figure 3-18-6)
-3.18.9 References
-1. Corrosion Control in the Refining Industry, NACE Course Book, NACE International, Houston, TX, 1999.
-2. L. Garverick, Corrosion in the Petrochemical Industry, ASM International, Materials Park, OH, 1994.
-3. H.M. Herro and R.D. Port, The Nalco Guide to Cooling Water System Failure Analysis, McGraw-Hill, New
-York, NY, 1991, pp. 259–263.
-"""
-
-knowledge_mitigation = """
-3.18.6 Prevention/Mitigation
-a) Corrosion inhibitors can reduce CO2 corrosion in steam condensate systems. Vapor phase inhibitors may be
-required to protect against condensing steam.
-b) Increasing condensate pH above 6 can reduce corrosion in steam condensate systems.
-c) 300 series SS are highly resistant to CO2 corrosion in most applications. 400 series SS and duplex stainless
-steel are also resistant.
-d) Selective upgrading to stainless steel is usually required in operating units designed to produce and/or
-remove CO2 (i.e. hydrogen plants and CO2 removal units). Selecting a stainless steel to mitigate CO2
-corrosion in any operating unit needs to account for other potential damage mechanisms applicable to the
-specific environment.
-e) CO2 corrosion in steam condensate systems can often be managed by correcting or improving the operating
-conditions and/or water treatment program.
-f) Ensure insulation and jacketing are in good condition to prevent unexpected and undesired cooling, which
-could lead to condensation and resultant CO2 corrosion.
-g) Internal coatings can be effective where the design and environment permit.
-3.18.7 Inspection and Monitoring
-a) VT, UT, and RT (preferably profile RT) can be used for general and local loss in thickness where water
-wetting is anticipated.
- The use of remote video probes can be effective for locations with limited or no direct line-of-sight (e.g.
-in boiler tubes).
-b) Preferential corrosion of welds may require angle beam UT (SWUT or PAUT) or RT.
-c) Permanently mounted thickness monitoring sensors can be used.
-d) Monitor water analyses (pH, Fe, O2, etc.) to determine changes in operating conditions.
-3.18.8 Related Mechanisms
-Boiler water condensate corrosion (3.9) and carbonate cracking (3.12).
-3.18.9 References
-1. Corrosion Control in the Refining Industry, NACE Course Book, NACE International, Houston, TX, 1999.
-2. L. Garverick, Corrosion in the Petrochemical Industry, ASM International, Materials Park, OH, 1994.
-3. H.M. Herro and R.D. Port, The Nalco Guide to Cooling Water System Failure Analysis, McGraw-Hill, New
-York, NY, 1991, pp. 259–263.
-"""
+SHOW_METRICS = env_flag("SHOW_METRICS")
+SHOW_FLEET_RISK = env_flag("SHOW_FLEET_RISK")
+FLEET_RISK_ROWS = env_int("FLEET_RISK_ROWS", 15)
+HISTORY_PAGE_SIZE = env_int("CHAT_HISTORY_PAGE_SIZE", 20)
+JOB_POLL_SECONDS = env_float("JOB_POLL_SECONDS", 0.5)
+STYLES_PATH = Path(__file__).parent / "assets" / "styles.css"
 
 st.set_page_config(
     page_title="Asset Integrity AI Agent",
@@ -101,214 +54,65 @@ st.set_page_config(
     layout="centered"
 )
 
-st.markdown("""
-<style>
-    /* Fixed Logo on Top-Left */
-    .fixed-logo {
-        position: fixed;
-        top: 1rem;
-        left: 1rem;
-        z-index: 9999;
-        width: 200px;
-        height: 200px;
-        background: white;
-        border-radius: 50%;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        padding: 1rem;
-    }
-
-    .fixed-logo img {
-        width: 100%;
-        height: 100%;
-        object-fit: contain;
-        display: block;
-    }
-
-    /* Remove default Streamlit padding */
-    .main .block-container {
-        max-width: 100% !important;
-        padding-left: 2rem !important;
-        padding-right: 2rem !important;
-        padding-top: 2rem !important;
-        margin: 0 !important;
-    }
-
-    /* Main app container - use 100% of the screen */
-    .stApp {
-        max-width: 100% !important;
-        margin: 0 !important;
-    }
-
-    /* Title styling - larger */
-    h1 {
-        padding-left: 0 !important;
-        margin-bottom: 2rem !important;
-        font-size: 2.5rem !important;
-    }
-
-    /* Chat messages container */
-    section[data-testid="stChatMessageContainer"] {
-        padding-left: 0 !important;
-        padding-right: 0 !important;
-        margin-left: 0 !important;
-        margin-right: 0 !important;
-    }
-
-    /* Individual chat messages - larger */
-    .stChatMessage {
-        padding: 1.5rem 0 !important;
-        margin-left: 0 !important;
-        margin-right: 0 !important;
-        font-size: 1.1rem !important;
-        line-height: 1.7 !important;
-    }
-
-    /* Chat message content text */
-    .stChatMessage p {
-        font-size: 1.1rem !important;
-        line-height: 1.7 !important;
-        margin-bottom: 0.5rem !important;
-    }
-
-    /* Chat message lists */
-    .stChatMessage ul, .stChatMessage ol {
-        font-size: 1.1rem !important;
-        line-height: 1.7 !important;
-    }
-
-    .stChatMessage li {
-        font-size: 1.1rem !important;
-        margin-bottom: 0.4rem !important;
-    }
-
-    /* Chat container scrollable - larger height */
-    .chat-container {
-        height: 90vh;
-        overflow-y: auto;
-        padding: 10px 0;
-        margin-bottom: 120px;
-    }
-
-    /* Style for upload button */
-    .upload-section {
-        background-color: #f0f2f6;
-        padding: 10px;
-        border-radius: 10px;
-        margin-bottom: 10px;
-    }
-
-    /* File uploader - larger */
-    section[data-testid="stFileUploadDropzone"] {
-        padding: 1.5rem !important;
-    }
-
-    .stFileUploader label {
-        font-size: 1.1rem !important;
-    }
-
-    /* Chat input wrapper */
-    .stChatInputContainer {
-        padding-left: 0 !important;
-        padding-right: 0 !important;
-        margin-left: 0 !important;
-        margin-right: 0 !important;
-        max-width: 100% !important;
-    }
-
-    /* Chat input styling */
-    .stChatInput {
-        background: transparent !important;
-        padding: 0 !important;
-        margin: 0 !important;
-        max-width: 100% !important;
-    }
-
-    /* Input field container */
-    .stChatInput > div {
-        background: transparent !important;
-        padding: 0 !important;
-        max-width: 100% !important;
-    }
-
-    /* Text input box itself - larger font and padding */
-    .stChatInput input[type="text"] {
-        width: 100% !important;
-        background-color: #2d2d2d !important;
-        border: 1px solid #404040 !important;
-        border-radius: 10px !important;
-        padding: 12px 16px !important;
-        color: #ffffff !important;
-        font-size: 1rem !important;
-        line-height: 1.4 !important;
-        outline: none !important;
-        box-shadow: none !important;
-        vertical-align: middle !important;
-        height: auto !important;
-    }
-
-    /* Input placeholder text */
-    .stChatInput input[type="text"]::placeholder {
-        font-size: 1rem !important;
-        color: #888888 !important;
-        line-height: 1.4 !important;
-    }
-
-    /* Input focus state */
-    .stChatInput input[type="text"]:focus {
-        border: 1px solid #606060 !important;
-        outline: none !important;
-        box-shadow: none !important;
-    }
-
-    /* Remove any textarea borders as well */
-    .stChatInput textarea {
-        outline: none !important;
-        box-shadow: none !important;
-        padding: 12px 16px !important;
-        font-size: 1rem !important;
-        line-height: 1.4 !important;
-        vertical-align: middle !important;
-    }
-
-    .stChatInput textarea:focus {
-        outline: none !important;
-        box-shadow: none !important;
-    }
-
-    /* Fix cursor positioning */
-    .stChatInput input, .stChatInput textarea {
-        display: block !important;
-    }
-
-    /* Vertically center send button */
-    .stChatInput button {
-        align-self: center !important;
-        margin-top: 0 !important;
-        margin-bottom: 0 !important;
-    }
-
-    /* Ensure chat input wrapper aligns items to center */
-    .stChatInputContainer > div {
-        display: flex !important;
-        align-items: center !important;
-    }
-
-    /* Remove Streamlit's default wide margins */
-    section.main > div {
-        max-width: 100% !important;
-        padding-left: 2rem !important;
-        padding-right: 2rem !important;
-        margin: 0 !important;
-    }
-
-    /* Base font size for better readability */
-    .main {
-        font-size: 1.1rem !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def load_styles():
+    return f"<style>\n{STYLES_PATH.read_text(encoding='utf-8')}</style>"
+
+st.markdown(load_styles(), unsafe_allow_html=True)
+
+@st.cache_resource
+def start_warm_up():
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+if WARM_UP:
+    start_warm_up()
+
+def session_id():
+    if not re.fullmatch(r"[0-9a-f]{32}", st.query_params.get("session", "")):
+        st.query_params["session"] = uuid.uuid4().hex
+    return st.query_params["session"]
+
+def restore_session():
+    store = get_store()
+    if store is None:
+        return
+    saved = store.load(session_id())
+    if saved is None:
+        return
+    messages, state = saved
+    st.session_state.messages = messages
+    st.session_state.persisted_messages = len(messages)
+    st.session_state.conversation_stage = state["conversation_stage"]
+    st.session_state.asset_number = state["asset_number"]
+    st.session_state.agent_states = state["agent_states"]
+    st.session_state.image_analyses = state["image_analyses"]
+    st.session_state.mechanism = state.get("mechanism")
+    if state["chemistry_summary"] is not None:
+        st.session_state.chemistry_summary = ChemistrySummary.from_dict(state["chemistry_summary"])
+
+def save_session():
+    store = get_store()
+    if store is None:
+        return
+    summary = st.session_state.chemistry_summary
+    start = st.session_state.persisted_messages
+    messages = st.session_state.messages
+    stage = st.session_state.conversation_stage
+    pending = [i for i, message in enumerate(messages) if "job" in message]
+    if pending:
+        stage = messages[pending[0]]["stage"] or stage
+        messages = messages[:pending[0]]
+    store.save(session_id(), messages[start:], start, {
+        "conversation_stage": stage,
+        "asset_number": st.session_state.asset_number,
+        "agent_states": st.session_state.agent_states,
+        "image_analyses": st.session_state.image_analyses,
+        "mechanism": st.session_state.mechanism,
+        "chemistry_summary": summary.to_dict() if summary is not None else None
+    })
+    st.session_state.persisted_messages = len(messages)
 
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -316,154 +120,217 @@ if "messages" not in st.session_state:
     st.session_state.asset_number = None
     st.session_state.uploaded_image = None
     st.session_state.show_video = False
-    st.session_state.model_client = None
-    st.session_state.agents_initialized = False
-
-async def initialize_agents():
-    if not st.session_state.agents_initialized:
-        st.session_state.model_client = OpenAIChatCompletionClient(
-            model="gpt-4.1-2025-04-14",
-            temperature=0
-        )
-
-        st.session_state.asset_agent = AssistantAgent(
-            "asset_management",
-            model_client=st.session_state.model_client,
-            system_message="""
-            You are an Asset Management Retrieval Agent.
-            When the engineer provides an asset number or tag:
-            Acknowledge the request briefly.
-            Retrieve and return the asset details from the management system.
-            Present the information in a clear, structured format, including (when available):
-
-            Equipment type
-            Tag/ID
-            Standard/specification
-            Material
-            Service
-            Normal operating conditions
-            Last maintenance/overhaul date
-
-            Rules:
-            Since currently you don't have connection to the database, generate something randomly, but replace the asset number with the user's input and keep the Equipment as Flowserve centrifugal pump itself for all the asset numbers.
-
-            Example Output:
-            "Asset {number} Details:
-
-- Equipment: Flowserve centrifugal pump
-- Tag: P-{number}A
-- Standard: API 610
-- Material: CF8M
-- Service: Produced water / condensate
-- Normal temperature: 65–85 °C
-- Last overhaul: 4 months ago
-
-            Before assessing, could you upload a photo of the corroded area?"
-            """
-        )
-
-        st.session_state.photo_agent = AssistantAgent(
-            "photo_agent",
-            model_client=st.session_state.model_client,
-            system_message="""
-            You are a photo analysis agent. When you receive confirmation that an image has been uploaded, respond with:
-            "Preliminary Assessment Based on Image
-
-            - Presence of iron carbonate (FeCO₃) scale deposits
-            - Localized grooving or channeling along flow direction (flow-assisted sweet corrosion)
-            - Uniform or mesa-type attack in areas with unstable FeCO₃ film
-            
-
-            This aligns with CO2 corrosion, which matches the behavior described in:
-
-            - API 571 – Damage Mechanisms (Section: CO2 corrosion)
-            - Reference: https://www.api.org/products-and-services/standards
-
-            To confirm the mechanism, I'll need chemistry and process data for the last 3–6 months:
-
-- Chlorides (ppm)
-- pH
-- Dissolved oxygen (ppb)
-- Temperature
-- Flow regime (any low-flow or minimum flow operation)
-- Inhibitor / scavenger dosing"
-            """
-        )
-
-        st.session_state.solution_agent = AssistantAgent(
-            "solution_expertise",
-            model_client=st.session_state.model_client,
-            system_message=f"""
-            {knowledge_description}
-
-            You are a reasoning agent.
-            Your task:
-            1. Acknowledge the chemistry data provided.
-            2. Perform analysis and randomly select the top 3 reasons from the knowledge description.
-            3. Do not mention randomly word in the output or top 3.
-            4. Return these top 3 reasons to the user.
-            5. Choose one among them as the "best" and clearly state it.
-            6. After that, output exactly:
-
-            "Maintenance History Correlation
-
-            Maintenance logs show:
-
-- Casing open for ~48 hours during overhaul
-- Nitrogen blanketing offline
-- Reduced scavenger dose after restart
-
-            This aligns with the contributors to localized corrosion after maintenance—specifically those related to oxygen ingress—as documented in API 571 (pages 93–97).
-            - Reference: https://www.api.org/products-and-services/standards
-            "
-
-            6. Finally ask: "Do you need the mitigation or prevention steps for the above problem?"
-            """
+    st.session_state.agent_states = {}
+    st.session_state.image_analyses = {}
+    st.session_state.chemistry_summary = None
+    st.session_state.mechanism = None
+    st.session_state.speculation = None
+    st.session_state.jobs = {}
+    st.session_state.history_visible = HISTORY_PAGE_SIZE
+    st.session_state.persisted_messages = 0
+    restore_session()
+
+def job_states(spec):
+    states = st.session_state.agent_states
+    return {spec.name: copy.deepcopy(states[spec.name])} if spec.name in states else {}
+
+def submit_reply(stream, status, on_done=None, stage=None, states=None, **extra):
+    job = jobs.submit(status, stream, states)
+    st.session_state.jobs[job.id] = job
+    st.session_state.messages.append({
+        "role": "assistant",
+        "content": "",
+        "job": job.id,
+        "on_done": on_done,
+        "stage": stage,
+        **extra
+    })
+
+def submit_agent(spec, message, status, images=(), **options):
+    states = job_states(spec)
+    submit_reply(
+        stream_agent_response(spec, states, message, images),
+        status,
+        states=states,
+        **options
+    )
+
+def submit_asset(prompt, stage):
+    lookup_started = time.perf_counter()
+    asset = get_registry().lookup(prompt)
+    metrics.record_lookup("asset_registry", time.perf_counter() - lookup_started, asset is not None)
+
+    if asset is not None and not PHRASE_WITH_LLM:
+        st.session_state.messages.append({"role": "assistant", "content": asset.to_markdown()})
+    elif asset is not None:
+        submit_agent(ASSET_AGENT, registry_prompt(prompt, asset), "Formatting the asset record...", stage=stage)
+    else:
+        submit_agent(ASSET_AGENT, prompt, "Fetching asset details from EAM, please allow me a minute...", stage=stage)
+    st.session_state.asset_number = asset.tag if asset is not None else prompt
+
+def read_photos(files):
+    images = []
+    for file in files:
+        try:
+            images.append(process_image(file.getvalue()))
+        except OSError:
+            st.error(f"Could not read {file.name} as an image")
+    return images
+
+def add_photo(image):
+    st.session_state.uploaded_image = image
+    st.session_state.messages.append({
+        "role": "user",
+        "content": "Here is the photo of the corroded area:",
+        "image": image.data,
+        "image_hash": image.digest
+    })
+
+def submit_photo(image, stage):
+    stage_started = time.perf_counter()
+    if image.digest in st.session_state.image_analyses:
+        st.session_state.messages.append({
+            "role": "assistant",
+            "content": st.session_state.image_analyses[image.digest]
+        })
+        metrics.record_stage(stage, time.perf_counter() - stage_started)
+    else:
+        submit_agent(
+            PHOTO_AGENT,
+            PHOTO_UPLOADED,
+            "Analyzing photo and identifying corrosion patterns...",
+            [image],
+            on_done="photo",
+            stage=stage,
+            image_hash=image.digest
         )
 
-        st.session_state.mitigation_agent = AssistantAgent(
-            "mitigation_agent",
-            model_client=st.session_state.model_client,
-            system_message=f"""
-            {knowledge_mitigation}
-
-            You are a mitigation agent.
-            Your task:
-            1. Read the knowledge_mitigation.
-            2. Randomly select the top 2 mitigation methods.
-            3. Return these top 2 methods to the user.
-            4. Do not mention randomly word or top 2.
-            5. Add these references - "This aligns with the contributors to localized corrosion after maintenance—specifically those related to oxygen ingress—as documented in API 571 (pages 93–97).
-            - Reference: https://www.api.org/products-and-services/standards
-            6. Finally ask: "Do you need the location of the pump in 3D plant model?"
-            """
+def submit_chemistry(message, stage):
+    submit_agent(
+        solution_agent(current_mechanism()),
+        thickness_prompt(message, st.session_state.asset_number),
+        "Analyzing chemistry data and correlating with damage mechanisms...",
+        on_done="solution",
+        stage=stage
+    )
+
+def finish_jobs():
+    finished = False
+    for message in st.session_state.messages:
+        if "job" not in message:
+            continue
+        job = st.session_state.jobs.get(message["job"])
+        if job is not None and not job.done():
+            continue
+        st.session_state.jobs.pop(message.pop("job"), None)
+        failed = job is None or job.error is not None
+        message["content"] = job.result if job is not None else "Error: the reply was interrupted"
+        on_done = message.pop("on_done")
+        stage = message.pop("stage")
+        if stage is not None and job is not None:
+            metrics.record_stage(stage, job.finished - job.submitted)
+        if failed:
+            message["error"] = True
+        else:
+            st.session_state.agent_states.update(job.states or {})
+            if on_done == "photo":
+                st.session_state.image_analyses[message["image_hash"]] = message["content"]
+            elif on_done == "solution" and st.session_state.conversation_stage == "awaiting_mitigation_request":
+                start_speculation()
+        message.pop("image_hash", None)
+        finished = True
+    if finished:
+        save_session()
+
+def current_mechanism():
+    if st.session_state.mechanism is None:
+        st.session_state.mechanism = route(
+            *(message["content"] for message in st.session_state.messages if message["role"] == "user")
+        ).number
+    return get_mechanism(st.session_state.mechanism)
+
+def start_speculation():
+    st.session_state.speculation = speculate(
+        mitigation_agent(current_mechanism()),
+        st.session_state.agent_states,
+        MITIGATION_REQUEST
+    )
+
+def take_speculation(states):
+    speculation = st.session_state.speculation
+    st.session_state.speculation = None
+    if speculation is None:
+        return None
+    return speculation.reply(states)
+
+def discard_speculation():
+    if st.session_state.speculation is not None:
+        st.session_state.speculation.cancel()
+        st.session_state.speculation = None
+
+def render_metrics_sidebar():
+    with st.sidebar:
+        st.subheader("Performance")
+        st.caption("Agent calls")
+        st.dataframe(metrics.rows(), hide_index=True)
+        lookups = metrics.lookup_rows()
+        if lookups:
+            st.caption("Registry lookups")
+            st.dataframe(lookups, hide_index=True)
+        st.caption("Stage transitions")
+        st.dataframe(metrics.stage_rows(), hide_index=True)
+        cache = get_cache()
+        if cache is not None:
+            stats = cache.stats()
+            st.caption(f"Response cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%})")
+        stats = jobs.stats()
+        st.caption(f"Background jobs: {stats['running']} running, {stats['queued']} queued, {stats['completed']} completed")
+        if SPECULATIVE_PREFETCH:
+            stats = budget.stats()
+            st.caption(
+                f"Speculative prefetch: {stats['used']} used, {stats['discarded']} discarded, "
+                f"{stats['rejected']} over budget, {stats['in_flight']} in flight"
+            )
+        if warm_up_timings:
+            st.caption("Warm-up: " + ", ".join(f"{step} {seconds:.2f} s" for step, seconds in warm_up_timings.items()))
+
+def render_risk_sidebar():
+    engine = get_risk_engine()
+    engine.refresh()
+    summary = st.session_state.chemistry_summary
+    if summary is not None and summary.latest and st.session_state.asset_number:
+        engine.set_chemistry(pd.DataFrame([{"tag": st.session_state.asset_number, **summary.latest}]))
+    with st.sidebar:
+        st.subheader("Fleet risk")
+        st.dataframe(
+            engine.ranked(FLEET_RISK_ROWS)[
+                ["rank", "tag", "risk_level", "pof", "cof", "remaining_life_years", "inspection_interval_years"]
+            ],
+            hide_index=True
         )
-
-        st.session_state.agents_initialized = True
-
-async def get_agent_response(agent, message):
-    try:
-        response = await agent.on_messages(
-            [TextMessage(content=message, source="user")],
-            cancellation_token=None
+        st.download_button(
+            "Download inspection priorities",
+            lambda: engine.ranked().to_csv(index=False),
+            "inspection_priorities.csv",
+            "text/csv",
+            on_click="ignore"
         )
-        return response.chat_message.content
-    except Exception as e:
-        return f"Error: {str(e)}"
 
 def display_video():
-    video_path = Path("Plant_3D.mp4")
+    source, clip = video_source(st.session_state.asset_number)
 
-    if video_path.exists():
-        st.video(str(video_path))
+    if source:
+        st.video(source, start_time=clip.start, end_time=clip.end)
     else:
-        st.warning("Video file not found. Please ensure 'demo_video.mp4' exists in the same directory.")
-        st.info(f"Looking for video at: {video_path}")
+        st.warning(f"Video file not found. Please ensure '{clip.file}' exists in {VIDEO_DIR}.")
 
 def main():
     st.title("🔧 Asset Integrity AI Agent")
 
-    asyncio.run(initialize_agents())
+    if SHOW_METRICS:
+        render_metrics_sidebar()
+    if SHOW_FLEET_RISK:
+        render_risk_sidebar()
 
     if len(st.session_state.messages) == 0:
         greeting = """Hello Engineer. I'm your Asset Integrity AI Agent.
@@ -484,13 +351,66 @@ Whenever you're ready, tell me what you found in the field."""
 
         st.session_state.messages.append({"role": "assistant", "content": greeting})
 
-    for message in st.session_state.messages:
+    chat()
+
+def rerun_chat():
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def render_history():
+    messages = st.session_state.messages
+    hidden = max(len(messages) - st.session_state.history_visible, 0)
+
+    if hidden:
+        if st.button(f"Show earlier messages ({hidden} hidden)", key="show_earlier"):
+            st.session_state.history_visible += HISTORY_PAGE_SIZE
+            rerun_chat()
+
+    for index in range(hidden, len(messages)):
+        message = messages[index]
+        if "job" in message:
+            pending_reply(index)
+            continue
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
             if "image" in message:
                 st.image(message["image"], width=300)
 
+            if message.get("work_orders") and not message.get("error"):
+                render_work_orders(message["content"], index)
+
+def render_work_orders(mitigation, index):
+    tag = st.session_state.asset_number or "UNKNOWN"
+    mechanism = current_mechanism()
+    st.download_button(
+        "Download CMMS work orders (CSV)",
+        lambda: to_csv(session_orders(tag, mechanism, mitigation, get_thickness_store().summary(tag))),
+        f"work_orders_{re.sub(r'[^A-Za-z0-9_-]+', '_', tag)}.csv",
+        "text/csv",
+        key=f"work_orders_{index}",
+        on_click="ignore"
+    )
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def pending_reply(index):
+    message = st.session_state.messages[index]
+    job = st.session_state.jobs.get(message.get("job"))
+    if job is None or job.done():
+        st.rerun()
+
+    with st.chat_message("assistant"):
+        if job.chunks:
+            st.markdown(job.text())
+        st.caption(f"⏳ {job.label}" if job.status == "running" else f"⏳ Queued: {job.label}")
+
+@st.fragment
+def chat():
+    finish_jobs()
+    render_history()
+
     if st.session_state.show_video:
         with st.chat_message("assistant"):
             display_video()
@@ -507,70 +427,87 @@ Whenever you're ready, tell me what you found in the field."""
             )
 
         if uploaded_file is not None:
-            st.session_state.uploaded_image = uploaded_file
-
-            st.session_state.messages.append({
-                "role": "user",
-                "content": "Here is the photo of the corroded area:",
-                "image": uploaded_file
-            })
-
-            with st.chat_message("user"):
-                st.markdown("Here is the photo of the corroded area:")
-                st.image(uploaded_file, width=300)
+            try:
+                image = process_image(uploaded_file.getvalue())
+            except OSError:
+                st.error(f"Could not read {uploaded_file.name} as an image")
+            else:
+                add_photo(image)
 
-            with st.spinner("Analyzing photo and identifying corrosion patterns..."):
-                response = asyncio.run(get_agent_response(
-                    st.session_state.photo_agent,
-                    "User has uploaded an image of corrosion."
-                ))
+                with st.chat_message("user"):
+                    st.markdown("Here is the photo of the corroded area:")
+                    st.image(image.data, width=300)
 
-                st.session_state.messages.append({"role": "assistant", "content": response})
+                submit_photo(image, "awaiting_photo")
                 st.session_state.conversation_stage = "awaiting_chemistry_data"
 
-                with st.chat_message("assistant"):
-                    st.markdown(response)
-
-            st.rerun()
+                save_session()
+                rerun_chat()
 
-    if prompt := st.chat_input("Type your message here..."):
-        st.session_state.messages.append({"role": "user", "content": prompt})
-
-        with st.chat_message("user"):
-            st.markdown(prompt)
+    if st.session_state.conversation_stage == "awaiting_chemistry_data":
+        st.markdown("---")
+        history_file = st.file_uploader(
+            "📈 Upload process historian export (CSV/Parquet)",
+            type=['csv', 'parquet'],
+            key="history_uploader"
+        )
 
-        if st.session_state.conversation_stage == "initial":
-            with st.spinner("Fetching asset details from EAM, please allow me a minute..."):
-                response = asyncio.run(get_agent_response(st.session_state.asset_agent, prompt))
-                st.session_state.messages.append({"role": "assistant", "content": response})
-                st.session_state.asset_number = prompt
-                st.session_state.conversation_stage = "awaiting_photo"
+        if history_file is not None:
+            try:
+                summary = summarize_file(history_file.getvalue(), history_file.name)
+            except ValueError as e:
+                st.error(f"Could not analyze {history_file.name}: {e}")
+            else:
+                st.session_state.chemistry_summary = summary
+                content = f"Here is the process data from {history_file.name}:\n\n{summary.to_prompt()}"
+                st.session_state.messages.append({"role": "user", "content": content})
 
-                with st.chat_message("assistant"):
-                    st.markdown(response)
+                with st.chat_message("user"):
+                    st.markdown(content)
 
-        elif st.session_state.conversation_stage == "awaiting_chemistry_data":
-            with st.spinner("Analyzing chemistry data and correlating with damage mechanisms..."):
-                response = asyncio.run(get_agent_response(st.session_state.solution_agent, prompt))
-                st.session_state.messages.append({"role": "assistant", "content": response})
+                submit_chemistry(summary.to_prompt(), "awaiting_chemistry_data")
                 st.session_state.conversation_stage = "awaiting_mitigation_request"
 
-                with st.chat_message("assistant"):
-                    st.markdown(response)
+                save_session()
+                rerun_chat()
 
-        elif st.session_state.conversation_stage == "awaiting_mitigation_request":
-            if "yes" in prompt.lower() or "sure" in prompt.lower():
-                with st.spinner("Retrieving mitigation strategies from API 571 and industry standards..."):
-                    response = asyncio.run(get_agent_response(
-                        st.session_state.mitigation_agent,
-                        "Please provide mitigation steps."
-                    ))
-                    st.session_state.messages.append({"role": "assistant", "content": response})
-                    st.session_state.conversation_stage = "awaiting_3d_model_request"
+    if submission := st.chat_input("Type your message here...", accept_file="multiple", file_type=['png', 'jpg', 'jpeg']):
+        prompt = submission.text
+        stage = st.session_state.conversation_stage
+        stage_started = time.perf_counter()
+        plan = plan_turn(stage, prompt, read_photos(submission.files))
 
-                    with st.chat_message("assistant"):
-                        st.markdown(response)
+        if prompt:
+            st.session_state.messages.append({"role": "user", "content": prompt})
+            with st.chat_message("user"):
+                st.markdown(prompt)
+        for image in plan.photos:
+            add_photo(image)
+
+        if plan.steps():
+            if plan.tag:
+                submit_asset(plan.tag, stage)
+            for image in plan.photos:
+                submit_photo(image, stage)
+            if plan.chemistry:
+                submit_chemistry(plan.chemistry, stage)
+            st.session_state.conversation_stage = plan.next_stage(stage)
+
+        elif prompt and st.session_state.conversation_stage == "awaiting_mitigation_request":
+            if "yes" in prompt.lower() or "sure" in prompt.lower():
+                spec = mitigation_agent(current_mechanism())
+                states = job_states(spec)
+                stream = take_speculation(states) or stream_agent_response(spec, states, MITIGATION_REQUEST)
+                submit_reply(
+                    stream,
+                    "Retrieving mitigation strategies from API 571 and industry standards...",
+                    stage=stage,
+                    states=states,
+                    work_orders=True
+                )
+                st.session_state.conversation_stage = "awaiting_3d_model_request"
             else:
+                discard_speculation()
                 response_content = "Understood. Let me know if you need anything else!"
                 st.session_state.messages.append({
                     "role": "assistant",
@@ -580,7 +517,7 @@ Whenever you're ready, tell me what you found in the field."""
                 with st.chat_message("assistant"):
                     st.markdown(response_content)
 
-        elif st.session_state.conversation_stage == "awaiting_3d_model_request":
+        elif prompt and st.session_state.conversation_stage == "awaiting_3d_model_request":
             if "yes" in prompt.lower() or "sure" in prompt.lower():
                 with st.spinner("Loading 3D plant model and locating asset..."):
                     response_content = "Here is the location of the pump in 3D model"
@@ -604,7 +541,10 @@ Whenever you're ready, tell me what you found in the field."""
                 with st.chat_message("assistant"):
                     st.markdown(response_content)
 
-        st.rerun()
+        if "job" not in st.session_state.messages[-1]:
+            metrics.record_stage(stage, time.perf_counter() - stage_started)
+        save_session()
+        rerun_chat()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,374 @@
+import argparse
+import io
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from asset_registry import normalize_tag
+from chemistry_engine import normalize_columns
+from config import env_float, env_int, env_str
+
+THICKNESS_STORE_PATH = Path(env_str("THICKNESS_STORE_PATH", "data/thickness"))
+CHUNK_ROWS = env_int("THICKNESS_CHUNK_ROWS", 500_000)
+RETIREMENT_FRACTION = env_float("THICKNESS_RETIREMENT_FRACTION", 0.5)
+PROMPT_LOCATIONS = env_int("THICKNESS_PROMPT_LOCATIONS", 10)
+MIN_RATE_DAYS = env_float("THICKNESS_MIN_RATE_DAYS", 180.0)
+
+MM_PER_INCH = 25.4
+MILS_PER_MM = 1000 / MM_PER_INCH
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
+
+COLUMN_ALIASES = {
+    "tag": ("tag", "tag_id", "asset_tag", "tag_number", "asset_number", "equipment_number"),
+    "cml": ("cml", "cml_id", "cml_number", "tml", "tml_id", "monitoring_location", "location", "sensor", "sensor_id", "point"),
+    "timestamp": ("timestamp", "time", "datetime", "date_time", "date", "reading_date", "inspection_date", "ts"),
+    "thickness_mm": ("thickness_mm", "wall_thickness_mm", "thickness", "wall_thickness", "ut_thickness", "reading"),
+    "thickness_in": ("thickness_in", "wall_thickness_in", "thickness_inch"),
+    "t_min_mm": ("t_min_mm", "tmin_mm"),
+    "t_min_in": ("t_min_in", "tmin_in"),
+    "t_min": ("t_min", "tmin", "minimum_thickness", "required_thickness", "retirement_thickness"),
+}
+
+COLUMNS = {
+    "location": np.dtype("<i4"),
+    "time": np.dtype("<i8"),
+    "thickness": np.dtype("<f4"),
+    "t_min": np.dtype("<f4"),
+}
+
+
+@dataclass
+class LocationRate:
+    cml: str
+    readings: int
+    first_date: str
+    last_date: str
+    thickness_mm: float
+    short_term_mpy: float
+    long_term_mpy: float
+    t_min_mm: float
+    t_min_assumed: bool
+    remaining_life_years: float
+
+    def describe(self):
+        life = "no measurable loss" if np.isinf(self.remaining_life_years) else f"{self.remaining_life_years:.1f} years remaining life"
+        return (
+            f"- CML {self.cml or '(unnamed)'}: {self.thickness_mm:.2f} mm on {self.last_date}, "
+            f"short-term {rate_text(self.short_term_mpy)}, long-term {rate_text(self.long_term_mpy)}, "
+            f"t_min {self.t_min_mm:.2f} mm{' (assumed)' if self.t_min_assumed else ''}, {life}"
+        )
+
+
+@dataclass
+class ThicknessSummary:
+    tag: str
+    readings: int
+    start: str
+    end: str
+    locations: list = field(default_factory=list)
+
+    def to_prompt(self):
+        lines = [
+            f"UT thickness monitoring for {self.tag} ({len(self.locations)} CMLs, {self.readings:,} readings, "
+            f"{self.start} to {self.end}); long-term rates from the first reading, short-term from the last reading "
+            f"at least {MIN_RATE_DAYS:g} days earlier:"
+        ]
+        lines.extend(location.describe() for location in self.locations[:PROMPT_LOCATIONS])
+        if len(self.locations) > PROMPT_LOCATIONS:
+            lines.append(f"- ... and {len(self.locations) - PROMPT_LOCATIONS} more CMLs with longer remaining life")
+        return "\n".join(lines)
+
+
+def rate_text(mpy):
+    return "n/a" if np.isnan(mpy) else f"{mpy:.1f} mpy"
+
+
+def read_chunks(source, name=None, chunk_rows=CHUNK_ROWS):
+    name = str(name or getattr(source, "name", source))
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    if name.lower().endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_rows)
+
+
+def prepare(frame):
+    frame = normalize_columns(frame, COLUMN_ALIASES)
+    inches = "thickness_mm" not in frame and "thickness_in" in frame
+    if inches:
+        frame["thickness_mm"] = frame["thickness_in"] * MM_PER_INCH
+    if "t_min_mm" not in frame and "t_min_in" in frame:
+        frame["t_min_mm"] = frame["t_min_in"] * MM_PER_INCH
+    elif "t_min_mm" not in frame and "t_min" in frame:
+        frame["t_min_mm"] = frame["t_min"] * (MM_PER_INCH if inches else 1.0)
+    missing = {"tag", "timestamp", "thickness_mm"} - set(frame.columns)
+    if missing:
+        raise ValueError(f"Thickness data needs tag, timestamp and thickness columns (missing {', '.join(sorted(missing))})")
+
+    timestamps = pd.to_datetime(frame["timestamp"], errors="coerce")
+    prepared = pd.DataFrame({
+        "tag": frame["tag"].astype(str).str.replace(r"[\s_]+", "", regex=True).str.upper(),
+        "cml": frame["cml"].fillna("").astype(str).str.strip() if "cml" in frame else "",
+        "time": timestamps.to_numpy(dtype="datetime64[s]").astype(np.int64),
+        "thickness": pd.to_numeric(frame["thickness_mm"], errors="coerce"),
+        "t_min": pd.to_numeric(frame["t_min_mm"], errors="coerce") if "t_min_mm" in frame else np.nan,
+    })
+    valid = timestamps.notna().to_numpy() & (prepared["thickness"] > 0).to_numpy() & (prepared["tag"] != "").to_numpy()
+    return prepared[valid]
+
+
+def compute_rates(location, time, thickness, t_min, retirement_fraction=RETIREMENT_FRACTION, min_rate_days=MIN_RATE_DAYS):
+    order = np.lexsort((time, location))
+    location, time = location[order], time[order]
+    thickness, t_min = thickness[order].astype(np.float64), t_min[order].astype(np.float64)
+
+    boundaries = location[1:] != location[:-1]
+    starts = np.flatnonzero(np.concatenate(([True], boundaries)))[:location.size]
+    ends = np.concatenate((starts[1:], [location.size]))[:starts.size] - 1
+
+    span = int(min_rate_days * 86400)
+    origin = time.min(initial=0) - span
+    width = time.max(initial=0) - origin + 1
+    group = np.cumsum(np.concatenate(([False], boundaries)))[:location.size]
+    key = group * width + (time - origin)
+    cutoff = np.arange(starts.size) * width + (time[ends] - span - origin)
+    previous = np.clip(np.searchsorted(key, cutoff, side="right") - 1, starts, np.maximum(ends - 1, starts))
+
+    def rate(begin):
+        years = (time[ends] - time[begin]) / SECONDS_PER_YEAR
+        loss = (thickness[begin] - thickness[ends]) * MILS_PER_MM
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where((years > 0) & (years >= min_rate_days / 365.25), loss / years, np.nan)
+
+    short_term, long_term = rate(previous), rate(starts)
+    governing = np.fmax(short_term, long_term)
+
+    required = t_min[ends]
+    assumed = np.isnan(required)
+    required = np.where(assumed, retirement_fraction * thickness[starts], required)
+    margin = np.maximum(thickness[ends] - required, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        remaining_life = np.where(governing > 0, margin * MILS_PER_MM / governing, np.inf)
+
+    return {
+        "location": location[starts],
+        "readings": ends - starts + 1,
+        "first_time": time[starts],
+        "last_time": time[ends],
+        "first_mm": thickness[starts],
+        "thickness_mm": thickness[ends],
+        "short_term_mpy": short_term,
+        "long_term_mpy": long_term,
+        "t_min_mm": required,
+        "t_min_assumed": assumed,
+        "remaining_life_years": remaining_life,
+    }
+
+
+def dates(seconds):
+    return np.datetime_as_string(seconds.astype("datetime64[s]"), unit="D")
+
+
+class ThicknessStore:
+    def __init__(self, path=THICKNESS_STORE_PATH):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._locations_path = self.path / "locations.jsonl"
+        self.locations = []
+        if self._locations_path.exists():
+            with open(self._locations_path, encoding="utf-8") as f:
+                self.locations = [json.loads(line) for line in f if line.strip()]
+        self._ids = {}
+        self._by_tag = defaultdict(list)
+        for i, (tag, cml) in enumerate(self.locations):
+            self._ids[tag, cml] = i
+            self._by_tag[tag].append(i)
+        self._rates = None
+
+    def _column_path(self, name):
+        return self.path / f"{name}.{COLUMNS[name].str[1:]}"
+
+    def columns(self):
+        with self._lock:
+            paths = {name: self._column_path(name) for name in COLUMNS}
+            rows = min(
+                (path.stat().st_size // COLUMNS[name].itemsize if path.exists() else 0 for name, path in paths.items()),
+                default=0
+            )
+            return {
+                name: np.memmap(path, dtype=COLUMNS[name], mode="r", shape=(rows,)) if rows else np.empty(0, COLUMNS[name])
+                for name, path in paths.items()
+            }
+
+    def append(self, frame):
+        frame = prepare(frame)
+        if frame.empty:
+            return 0
+        codes, keys = pd.factorize(frame["tag"] + "\x1f" + frame["cml"])
+        with self._lock:
+            ids = []
+            added = []
+            for key in keys:
+                tag, cml = key.split("\x1f", 1)
+                if (tag, cml) not in self._ids:
+                    self._ids[tag, cml] = len(self.locations)
+                    self._by_tag[tag].append(len(self.locations))
+                    self.locations.append([tag, cml])
+                    added.append(json.dumps([tag, cml]) + "\n")
+                ids.append(self._ids[tag, cml])
+            if added:
+                with open(self._locations_path, "a", encoding="utf-8") as f:
+                    f.writelines(added)
+
+            values = {
+                "location": np.asarray(ids, dtype=COLUMNS["location"])[codes],
+                "time": frame["time"].to_numpy(),
+                "thickness": frame["thickness"].to_numpy(),
+                "t_min": frame["t_min"].to_numpy(),
+            }
+            for name, column in values.items():
+                with open(self._column_path(name), "ab") as f:
+                    f.write(np.ascontiguousarray(column, dtype=COLUMNS[name]).tobytes())
+            self._rates = None
+        return len(frame)
+
+    def import_file(self, source, name=None):
+        return sum(self.append(chunk) for chunk in read_chunks(source, name))
+
+    def count(self):
+        return self.columns()["location"].size
+
+    def rates(self):
+        columns = self.columns()
+        rows = columns["location"].size
+        cached = self._rates
+        if cached is None or cached[0] != rows:
+            cached = self._rates = (rows, compute_rates(**columns))
+        return cached[1]
+
+    def frame(self):
+        rates = dict(self.rates())
+        locations = np.asarray(self.locations, dtype=object).reshape(-1, 2)[rates.pop("location")]
+        frame = pd.DataFrame({"tag": locations[:, 0], "cml": locations[:, 1], **rates})
+        frame["first_date"], frame["last_date"] = dates(frame.pop("first_time")), dates(frame.pop("last_time"))
+        return frame.round(3).sort_values("remaining_life_years", kind="stable", ignore_index=True)
+
+    def select(self, tags):
+        with self._lock:
+            ids = [i for tag in tags for i in self._by_tag.get(normalize_tag(tag), ())]
+        columns = self.columns()
+        mask = np.isin(columns["location"], ids)
+        return {name: np.asarray(column[mask]) for name, column in columns.items()}
+
+    def tags_since(self, rows):
+        locations = np.unique(self.columns()["location"][rows:])
+        with self._lock:
+            return {self.locations[location][0] for location in locations}
+
+    def tag_rates(self, tags=None):
+        rates = self.rates() if tags is None else compute_rates(**self.select(tags))
+        with self._lock:
+            location_tags = [self.locations[location][0] for location in rates["location"]]
+        frame = pd.DataFrame({
+            "tag": location_tags,
+            "governing_mpy": np.fmax(rates["short_term_mpy"], rates["long_term_mpy"]),
+            "remaining_life_years": rates["remaining_life_years"],
+            "thickness_fraction": rates["thickness_mm"] / rates["first_mm"],
+        })
+        return frame.groupby("tag").agg(
+            governing_mpy=("governing_mpy", "max"),
+            remaining_life_years=("remaining_life_years", "min"),
+            thickness_fraction=("thickness_fraction", "min")
+        )
+
+    def summary(self, tag):
+        key = normalize_tag(tag)
+        columns = self.select([key])
+        if not columns["location"].size:
+            return None
+        rates = compute_rates(**columns)
+        first_dates, last_dates = dates(rates["first_time"]), dates(rates["last_time"])
+        locations = [
+            LocationRate(
+                self.locations[location][1],
+                int(rates["readings"][i]),
+                str(first_dates[i]),
+                str(last_dates[i]),
+                float(rates["thickness_mm"][i]),
+                float(rates["short_term_mpy"][i]),
+                float(rates["long_term_mpy"][i]),
+                float(rates["t_min_mm"][i]),
+                bool(rates["t_min_assumed"][i]),
+                float(rates["remaining_life_years"][i])
+            )
+            for i, location in enumerate(rates["location"])
+        ]
+        locations.sort(key=lambda location: location.remaining_life_years)
+        start, end = dates(np.array([rates["first_time"].min(), rates["last_time"].max()]))
+        return ThicknessSummary(key, int(columns["location"].size), str(start), str(end), locations)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_thickness_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ThicknessStore()
+    return _store
+
+
+def thickness_prompt(message, tag):
+    summary = get_thickness_store().summary(tag) if tag else None
+    return f"{message}\n\n{summary.to_prompt()}" if summary is not None else message
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest UT thickness readings and compute corrosion rates.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="append CSV or Parquet thickness readings")
+    import_parser.add_argument("files", nargs="+")
+    summary_parser = commands.add_parser("summary", help="show corrosion rates and remaining life for a tag")
+    summary_parser.add_argument("tag")
+    rates_parser = commands.add_parser("rates", help="export per-CML rates for the whole fleet, shortest remaining life first")
+    rates_parser.add_argument("-o", "--output", default="thickness_rates.csv")
+    args = parser.parse_args(argv)
+
+    store = get_thickness_store()
+    started = time.perf_counter()
+    if args.command == "import":
+        for path in args.files:
+            print(f"{path}: {store.import_file(Path(path)):,} readings imported")
+        print(f"store now holds {store.count():,} readings at {len(store.locations):,} CMLs ({time.perf_counter() - started:.2f} s)")
+        return 0
+
+    if args.command == "rates":
+        frame = store.frame()
+        frame.to_csv(args.output, index=False)
+        print(f"{len(frame):,} CMLs written to {args.output} ({time.perf_counter() - started:.2f} s)")
+        return 0
+
+    summary = store.summary(args.tag)
+    if summary is None:
+        print(f"{args.tag}: no thickness readings")
+        return 1
+    print(summary.to_prompt())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+import json
+import logging
+import mimetypes
+import re
+import sys
+import threading
+from dataclasses import dataclass
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+from asset_registry import TAG_PATTERN, normalize_tag
+from config import env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+VIDEO_DIR = Path(env_str("VIDEO_DIR", ".")).resolve()
+VIDEO_INDEX_PATH = Path(env_str("VIDEO_INDEX", str(VIDEO_DIR / "video_index.json")))
+DEFAULT_VIDEO = env_str("DEFAULT_VIDEO", "Plant_3D.mp4")
+VIDEO_BASE_URL = env_str("VIDEO_BASE_URL")
+VIDEO_SERVER_PORT = env_int("VIDEO_SERVER_PORT", 8502)
+VIDEO_PUBLIC_URL = env_str("VIDEO_PUBLIC_URL")
+CACHE_MAX_AGE = env_int("VIDEO_CACHE_MAX_AGE", 86400)
+
+VIDEO_EXTENSIONS = (".mp4", ".webm", ".m4v", ".mov")
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 256 * 1024
+
+
+@dataclass(frozen=True)
+class Clip:
+    file: str
+    start: int = 0
+    end: int = None
+
+
+class VideoIndex:
+    def __init__(self, clips=None, default=None):
+        self.clips = {normalize_tag(tag): clip for tag, clip in (clips or {}).items()}
+        self.default = default or Clip(DEFAULT_VIDEO)
+
+    @classmethod
+    def load(cls, path=VIDEO_INDEX_PATH):
+        if not Path(path).exists():
+            return cls()
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        default = Clip(**data["default"]) if "default" in data else None
+        clips = {tag: Clip(**clip) for tag, clip in data.get("assets", {}).items()}
+        return cls(clips, default)
+
+    def lookup(self, tag):
+        if tag:
+            for candidate in (tag, *TAG_PATTERN.findall(tag)):
+                clip = self.clips.get(normalize_tag(candidate))
+                if clip is not None:
+                    return clip
+        return self.default
+
+
+def resolve_video(name, root=VIDEO_DIR):
+    path = (root / unquote(name).lstrip("/")).resolve()
+    if root not in path.parents or path.suffix.lower() not in VIDEO_EXTENSIONS or not path.is_file():
+        return None
+    return path
+
+
+class VideoHandler(BaseHTTPRequestHandler):
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    def do_GET(self):
+        self.serve(send_body=True)
+
+    def serve(self, send_body):
+        path = resolve_video(self.path.split("?")[0])
+        if path is None:
+            self.send_error(404)
+            return
+
+        stat = path.stat()
+        size = stat.st_size
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        start, end = 0, size - 1
+        match = RANGE_PATTERN.match(self.headers.get("Range", "").strip())
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(size - int(match.group(2)), 0)
+            if start > end or start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+
+        length = end - start + 1
+        self.send_header("Content-Type", mimetypes.guess_type(path.name)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(stat.st_mtime, usegmt=True))
+        self.send_header("Cache-Control", f"public, max-age={CACHE_MAX_AGE}")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        if not send_body:
+            return
+
+        with path.open("rb") as f:
+            f.seek(start)
+            remaining = length
+            try:
+                while remaining > 0:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_failed = False
+_index = None
+_lock = threading.Lock()
+
+
+def start_server(port=VIDEO_SERVER_PORT):
+    global _server, _server_failed
+    with _lock:
+        if _server is None and not _server_failed and port and not VIDEO_BASE_URL:
+            try:
+                _server = ThreadingHTTPServer(("0.0.0.0", port), VideoHandler)
+            except OSError as e:
+                logger.warning("video server could not bind port %d, serving videos through Streamlit: %s", port, e)
+                _server_failed = True
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="video-server", daemon=True).start()
+    return _server
+
+
+def get_index():
+    global _index
+    with _lock:
+        if _index is None:
+            _index = VideoIndex.load()
+    return _index
+
+
+def video_source(tag):
+    clip = get_index().lookup(tag)
+    if VIDEO_BASE_URL:
+        return f"{VIDEO_BASE_URL.rstrip('/')}/{quote(clip.file)}", clip
+    path = resolve_video(clip.file)
+    if path is None:
+        return None, clip
+    if VIDEO_PUBLIC_URL and start_server() is not None:
+        return f"{VIDEO_PUBLIC_URL.rstrip('/')}/{quote(clip.file)}", clip
+    return str(path), clip
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else VIDEO_SERVER_PORT
+    print(f"Serving {VIDEO_DIR} on port {port}")
+    ThreadingHTTPServer(("0.0.0.0", port), VideoHandler).serve_forever()
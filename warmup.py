@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import importlib
+import logging
+import sys
+import time
+from contextlib import contextmanager
+
+from config import env_flag, env_float
+
+WARM_UP = env_flag("WARM_UP", True)
+WARM_UP_CONNECT = env_flag("WARM_UP_CONNECT", True)
+WARM_UP_TIMEOUT = env_float("WARM_UP_TIMEOUT", 15.0)
+
+HEAVY_MODULES = (
+    "openai",
+    "autogen_core",
+    "autogen_agentchat.agents",
+    "autogen_ext.models.openai",
+    "tiktoken",
+    "pandas",
+    "pyarrow",
+    "PIL.Image",
+)
+
+logger = logging.getLogger(__name__)
+timings = {}
+failed = set()
+
+
+@contextmanager
+def timed(step):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        failed.add(step)
+        logger.warning("warm-up step %s failed: %s", step, e)
+    finally:
+        timings[step] = time.perf_counter() - started
+
+
+async def open_connections(model_clients):
+    from autogen_core.models import UserMessage
+    messages = [UserMessage(content="ping", source="warm_up")]
+    await asyncio.gather(*(client.create(messages, extra_create_args={"max_tokens": 1}) for client in model_clients))
+
+
+def warm_up(connect=WARM_UP_CONNECT):
+    import agents
+    import knowledge
+    from asset_registry import get_registry
+    from event_loop import run
+    from mechanisms import MECHANISMS
+    from response_cache import get_cache
+    from session_store import get_store
+    from thickness import get_thickness_store
+
+    failed.clear()
+    with timed("imports"):
+        agents.load_agent_stack()
+    if "imports" in failed:
+        logger.warning("warm-up skipped the agent steps because the imports failed")
+    else:
+        with timed("clients"):
+            clients = [client for _, client in agents.model_clients()]
+        with timed("prompts"):
+            for mechanism in MECHANISMS.values():
+                agents.solution_agent(mechanism)
+                agents.mitigation_agent(mechanism)
+                knowledge.get_index(mechanism.number)
+    with timed("stores"):
+        get_registry()
+        get_cache()
+        get_store()
+        get_thickness_store()
+    if failed & {"imports", "clients"}:
+        logger.warning("warm-up skipped the tokenizer and connection steps because no model client was created")
+    else:
+        with timed("tokenizer"):
+            from autogen_core.models import SystemMessage
+            for client in clients:
+                client.count_tokens([SystemMessage(content=agents.ASSET_AGENT.system_message)])
+        if connect:
+            with timed("connection"):
+                run(open_connections(clients), WARM_UP_TIMEOUT)
+    logger.info("warm-up finished: %s", ", ".join(f"{step} {seconds:.2f} s" for step, seconds in timings.items()))
+    return dict(timings)
+
+
+def import_times(modules=HEAVY_MODULES):
+    times = {}
+    for name in modules:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        times[name] = time.perf_counter() - started
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import times and warm the agent stack.")
+    parser.add_argument("--no-connect", action="store_true", help="skip opening a connection to the model endpoint")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    started = time.perf_counter()
+    import agents
+    print(f"import agents: {time.perf_counter() - started:.3f} s")
+    for name, seconds in import_times().items():
+        print(f"import {name}: {seconds:.3f} s")
+    for step, seconds in warm_up(connect=not args.no_connect).items():
+        print(f"warm-up {step}: {seconds:.3f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass, fields
+from datetime import date, timedelta
+from pathlib import Path
+from string import Template
+
+from asset_registry import Asset, get_registry
+from config import env_int, env_str
+from mechanisms import MECHANISMS, get_mechanism
+
+SHORT_TEXT_LENGTH = env_int("WORK_ORDER_SHORT_TEXT_LENGTH", 40)
+PLANNER_GROUP = env_str("WORK_ORDER_PLANNER_GROUP", "INTEGRITY")
+
+
+@dataclass(frozen=True)
+class Method:
+    code: str
+    name: str
+    work_type: str
+    pattern: re.Pattern
+    template: Template
+
+
+METHODS = (
+    Method("VT", "Visual inspection", "Inspection", re.compile(r"\bVT\b|visual (?:inspection|examination)|video probe", re.I), Template(
+        "Perform visual inspection (VT) of $equipment $tag for $mechanism (API 571 $mechanism_number). "
+        "Check insulation and jacketing, and record any thinning, pitting or grooving with photographs and locations."
+    )),
+    Method("UT", "Ultrasonic thickness", "Inspection", re.compile(r"\bUT\b|ultrasonic (?:thickness|testing)|thickness (?:readings|survey|monitoring)", re.I), Template(
+        "Take UT thickness readings at all CMLs of $equipment $tag ($material). "
+        "Compare against t_min and update the short- and long-term corrosion rates and remaining life.$thickness_note"
+    )),
+    Method("RT", "Profile radiography", "Inspection", re.compile(r"\bRT\b|radiograph", re.I), Template(
+        "Perform profile RT of $tag at the locations most exposed to $mechanism (turbulence, impingement, condensation points) "
+        "to size local wall loss and confirm the UT results."
+    )),
+    Method("PAUT", "Phased-array UT mapping", "Inspection", re.compile(r"\bPAUT\b|phased[- ]array", re.I), Template(
+        "Perform PAUT corrosion mapping of $tag to characterise the extent and depth of $mechanism damage. "
+        "Report the minimum remaining wall, map coverage and grid size."
+    )),
+    Method("INH", "Corrosion inhibitor dosing", "Chemical treatment", re.compile(
+        r"inhibitor|chemical (?:injection|dosing|treatment)|oxygen scavenger|neutrali[sz]ing amine|filming amine", re.I
+    ), Template(
+        "Review corrosion inhibitor dosing for the $service serving $tag. "
+        "Verify injection rate and residuals, adjust to the treatment programme and record the results."
+    )),
+)
+METHODS_BY_CODE = {method.code: method for method in METHODS}
+
+SHORT_TEXT = Template("$code $tag $mechanism")
+PRIORITIES = {"high": 1, "medium-high": 2, "medium": 3, "low": 4}
+DUE_DAYS = {1: 14, 2: 30, 3: 90, 4: 180}
+DEFAULT_PRIORITY = 3
+FLEET_METHODS = ("VT", "UT")
+
+
+@dataclass
+class WorkOrder:
+    order_id: str
+    tag: str
+    asset_number: str
+    equipment: str
+    method: str
+    work_type: str
+    priority: int
+    due_date: str
+    short_text: str
+    long_text: str
+    mechanism: str
+    planner_group: str = PLANNER_GROUP
+
+
+ORDER_FIELDS = [field.name for field in fields(WorkOrder)]
+
+
+def detect_methods(text):
+    return [method.code for method in METHODS if method.pattern.search(text or "")]
+
+
+def thickness_note(summary):
+    if summary is None or not summary.locations:
+        return ""
+    location = summary.locations[0]
+    life = "no measurable loss" if location.remaining_life_years == float("inf") else f"{location.remaining_life_years:.1f} years remaining life"
+    return f" Governing CML {location.cml or '(unnamed)'}: {location.thickness_mm:.2f} mm on {location.last_date}, {life}."
+
+
+def generate_orders(asset, mechanism, methods, priority=DEFAULT_PRIORITY, due_days=None, today=None, thickness=None):
+    due = (today or date.today()) + timedelta(days=DUE_DAYS[priority] if due_days is None else min(due_days, DUE_DAYS[priority]))
+    values = {
+        "tag": asset.tag,
+        "equipment": asset.equipment or "asset",
+        "material": asset.material or "material not recorded",
+        "service": asset.service or "process service",
+        "mechanism": mechanism.title,
+        "mechanism_number": mechanism.number,
+        "thickness_note": thickness_note(thickness),
+    }
+    orders = []
+    for code in methods:
+        method = METHODS_BY_CODE[code]
+        orders.append(WorkOrder(
+            f"{asset.tag}-{mechanism.number}-{code}",
+            asset.tag,
+            asset.asset_number,
+            asset.equipment,
+            method.name,
+            method.work_type,
+            priority,
+            due.isoformat(),
+            SHORT_TEXT.substitute(values, code=code)[:SHORT_TEXT_LENGTH],
+            method.template.substitute(values),
+            f"{mechanism.number} {mechanism.title}"
+        ))
+    return orders
+
+
+def session_orders(tag, mechanism, mitigation, thickness=None):
+    asset = get_registry().lookup(tag) or Asset(tag=tag)
+    return generate_orders(asset, mechanism, detect_methods(mitigation) or FLEET_METHODS, thickness=thickness)
+
+
+def assessment_orders(path, today=None):
+    registry = get_registry()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            result = json.loads(line) if line.strip() else {}
+            if not result.get("asset_tag") or result.get("error"):
+                continue
+            mechanism = MECHANISMS.get(str(result.get("mechanism", "")).split(" ", 1)[0]) or get_mechanism()
+            asset = registry.get(result["asset_tag"]) or Asset(tag=result["asset_tag"])
+            methods = detect_methods(result.get("mitigation")) or FLEET_METHODS
+            yield from generate_orders(asset, mechanism, methods, today=today)
+
+
+def fleet_orders(ranked, mechanism=None, today=None):
+    mechanism = mechanism or get_mechanism()
+    columns = ("tag", "equipment", "material", "service", "risk_level", "environment", "inspection_interval_years")
+    for tag, equipment, material, service, level, environment, interval in ranked[list(columns)].itertuples(index=False):
+        methods = FLEET_METHODS + (("INH",) if environment > 1 else ())
+        yield from generate_orders(
+            Asset(tag=tag, equipment=equipment, material=material, service=service),
+            mechanism,
+            methods,
+            PRIORITIES.get(level, DEFAULT_PRIORITY),
+            int(interval * 365.25),
+            today
+        )
+
+
+def to_csv(orders):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, ORDER_FIELDS)
+    writer.writeheader()
+    writer.writerows(asdict(order) for order in orders)
+    return buffer.getvalue()
+
+
+def to_json(orders):
+    return json.dumps([asdict(order) for order in orders], ensure_ascii=False, indent=2)
+
+
+def export(orders, path):
+    path = Path(path)
+    path.write_text(to_json(orders) if path.suffix.lower() == ".json" else to_csv(orders), encoding="utf-8")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate CMMS work orders from templates and export them for import.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    fleet_parser = commands.add_parser("fleet", help="inspection orders for the fleet in risk-ranked order")
+    fleet_parser.add_argument("--top", type=int, default=None, help="highest-risk assets to include (default all)")
+    fleet_parser.add_argument("--mechanism", default=None, help="API 571 mechanism number for the order texts")
+    assessments_parser = commands.add_parser("assessments", help="orders from batch_assess results")
+    assessments_parser.add_argument("results", help="JSONL written by batch_assess.py")
+    for command in (fleet_parser, assessments_parser):
+        command.add_argument("-o", "--output", default="work_orders.csv", help="CSV or JSON file for CMMS import")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.command == "fleet":
+        from risk import get_risk_engine
+
+        ranked = get_risk_engine().ranked(args.top)
+        started = time.perf_counter()
+        orders = list(fleet_orders(ranked, get_mechanism(args.mechanism)))
+    else:
+        orders = list(assessment_orders(args.results))
+    elapsed = time.perf_counter() - started
+    export(orders, args.output)
+    print(
+        f"{len(orders):,} work orders written to {args.output} "
+        f"({elapsed * 1000 / max(len(orders), 1):.3f} ms per order)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())